@@ -1,8 +1,10 @@
 #pragma once
 
 #include <iostream>
+#include <array>
 #include <vector>
 #include <string>
+#include <string_view>
 #include <cstdint>
 #include <memory>
 #include <map>
@@ -33,6 +35,15 @@ enum class GateType {
 // Wire label type - 128-bit label
 using WireLabel = std::array<uint8_t, WIRE_LABEL_SIZE>;
 
+// Packed plaintext wire values for SWAR evaluation: bit j of a word holds
+// the wire's value for independent test vector j, so one 64-bit gate
+// operation evaluates 64 assignments at once
+using WireBits = uint64_t;
+
+// Four packed words per wire: a 256-lane bit-slice that maps onto one AVX2
+// register when the CPU has it
+using WireBits256 = std::array<WireBits, 4>;
+
 // Gate structure
 struct Gate {
     int output_wire;
@@ -47,6 +58,22 @@ struct Gate {
         : output_wire(out), input_wire1(in1), input_wire2(-1), type(t) {}
 };
 
+// Structure-of-arrays view of a gate list.  Hot evaluation loops iterate
+// one dense array per field (wire indices, gate types) instead of striding
+// over Gate structs, which keeps the index stream contiguous for the
+// prefetcher.  Gate/std::vector<Gate> stays the canonical representation
+// for parsing and serialization.
+struct GateSoA {
+    std::vector<int32_t> output_wire;
+    std::vector<int32_t> input_wire1;
+    std::vector<int32_t> input_wire2;
+    std::vector<uint8_t> type;
+
+    size_t size() const { return type.size(); }
+
+    static GateSoA from_gates(const std::vector<Gate>& gates);
+};
+
 // Circuit structure
 struct Circuit {
     int num_inputs;
@@ -60,6 +87,23 @@ struct Circuit {
     Circuit() : num_inputs(0), num_outputs(0), num_gates(0), num_wires(0) {}
 };
 
+inline GateSoA GateSoA::from_gates(const std::vector<Gate>& gates) {
+    GateSoA soa;
+    soa.output_wire.reserve(gates.size());
+    soa.input_wire1.reserve(gates.size());
+    soa.input_wire2.reserve(gates.size());
+    soa.type.reserve(gates.size());
+
+    for (const auto& gate : gates) {
+        soa.output_wire.push_back(gate.output_wire);
+        soa.input_wire1.push_back(gate.input_wire1);
+        soa.input_wire2.push_back(gate.input_wire2);
+        soa.type.push_back(static_cast<uint8_t>(gate.type));
+    }
+
+    return soa;
+}
+
 // Garbled gate structure (4 ciphertexts)
 struct GarbledGate {
     std::array<std::vector<uint8_t>, 4> ciphertexts;
@@ -75,8 +119,12 @@ struct GarbledGate {
 struct GarbledCircuit {
     Circuit circuit;
     std::vector<GarbledGate> garbled_gates;
-    std::map<int, std::pair<WireLabel, WireLabel>> input_labels; // wire_id -> (label0, label1)
-    std::map<int, WireLabel> output_mapping; // For output decoding
+    // Label pair per wire, indexed directly by wire id ([0] = label0,
+    // [1] = label1); wire ids are dense small integers, so a flat vector
+    // replaces the old map.  wire_labelled[w] marks which slots are valid.
+    std::vector<std::array<WireLabel, 2>> input_labels;
+    std::vector<uint8_t> wire_labelled;
+    std::vector<WireLabel> output_mapping; // 0-label per output wire id, for output decoding
     
     GarbledCircuit() = default;
     GarbledCircuit(const Circuit& c) : circuit(c) {
@@ -104,6 +152,9 @@ struct Message {
     
     Message() : type(MessageType::HELLO), size(0) {}
     Message(MessageType t, const std::vector<uint8_t>& d) : type(t), size(d.size()), data(d) {}
+    // Move overload: adopts the caller's buffer instead of copying it.
+    // For a CIRCUIT message the copy is the whole serialized circuit.
+    Message(MessageType t, std::vector<uint8_t>&& d) : type(t), size(d.size()), data(std::move(d)) {}
 };
 
 // Utility functions
@@ -121,16 +172,51 @@ inline std::string gate_type_to_string(GateType type) {
     }
 }
 
-inline GateType string_to_gate_type(const std::string& str) {
-    if (str == "AND") return GateType::AND;
-    if (str == "OR") return GateType::OR;
-    if (str == "XOR") return GateType::XOR; 
-    if (str == "NAND") return GateType::NAND;
-    if (str == "NOR") return GateType::NOR;
-    if (str == "NOT") return GateType::NOT;
-    if (str == "INPUT") return GateType::INPUT;
-    if (str == "OUTPUT") return GateType::OUTPUT;
-    throw std::runtime_error("Unknown gate type: " + str);
+inline GateType string_to_gate_type(std::string_view str) {
+    // Takes a view so the parser's tokens need no per-call string; the
+    // length switch prunes the keyword set to a couple of comparisons
+    switch (str.size()) {
+        case 2:
+            if (str == "OR") return GateType::OR;
+            break;
+        case 3:
+            if (str == "AND") return GateType::AND;
+            if (str == "XOR") return GateType::XOR;
+            if (str == "NOR") return GateType::NOR;
+            if (str == "NOT") return GateType::NOT;
+            break;
+        case 4:
+            if (str == "NAND") return GateType::NAND;
+            break;
+        case 5:
+            if (str == "INPUT") return GateType::INPUT;
+            break;
+        case 6:
+            if (str == "OUTPUT") return GateType::OUTPUT;
+            break;
+        default:
+            break;
+    }
+    throw std::runtime_error("Unknown gate type: " + std::string(str));
+}
+
+// Parse a command-line bit string like "1011" into bits.  Spaces and
+// commas are ignored; anything else is rejected.  Shared by the garbler
+// and evaluator front-ends.
+inline std::vector<bool> parse_input_bits(const std::string& input_string) {
+    std::vector<bool> inputs;
+    inputs.reserve(input_string.size());
+
+    for (char c : input_string) {
+        unsigned v = static_cast<unsigned>(c - '0');
+        if (v <= 1) {
+            inputs.push_back(v != 0);
+        } else if (c != ' ' && c != ',') {
+            throw std::invalid_argument("Invalid input bit: " + std::string(1, c));
+        }
+    }
+
+    return inputs;
 }
 
 inline bool gate_function(GateType type, bool a, bool b = false) {
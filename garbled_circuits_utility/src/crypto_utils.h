@@ -5,6 +5,33 @@
 #include <openssl/aes.h>
 #include <openssl/rand.h>
 #include <openssl/evp.h>
+#include <immintrin.h>
+
+/**
+ * Fixed-key AES-128 hash for garbling (half-gates style):
+ *
+ *   H(x, tweak) = AES_k(2x ^ tweak) ^ (2x ^ tweak)
+ *
+ * where k is a fixed public key expanded once at startup.  A single AES-NI
+ * round chain is far cheaper than a SHA-256 compression, which makes this
+ * the hash of choice for per-gate work in the half-gates construction.
+ */
+class AESFixedKey {
+public:
+    AESFixedKey();
+
+    // H(x, tweak) as above (Davies-Meyer over fixed-key AES)
+    WireLabel hash(const WireLabel& x, uint64_t tweak) const;
+
+    // Hash four labels at once.  The four AES round chains are independent,
+    // so interleaving them hides the aesenc latency (~4-7 cycles at one
+    // issue per cycle) and roughly quadruples throughput over four
+    // back-to-back hash() calls.
+    void hash4(const WireLabel in[4], const uint64_t tweaks[4], WireLabel out[4]) const;
+
+private:
+    __m128i round_keys[11];
+};
 
 /**
  * Cryptographic utilities for garbled circuits
@@ -17,21 +44,51 @@ public:
     
     // Generate multiple random labels
     static std::vector<WireLabel> generate_random_labels(size_t count);
+
+    // Fill a caller-owned label array with one bulk draw from the DRBG
+    // instead of one RAND_bytes call per label
+    static void fill_random_labels(WireLabel* dst, size_t count);
     
     // Pseudorandom function G(key1, key2, gate_id) -> output
     static std::vector<uint8_t> PRF(const WireLabel& key1, const WireLabel& key2, uint32_t gate_id);
-    
+
+    // Batched PRF for the four rows of one garbled table: the rows' AES
+    // chains are independent, so each hash stage runs through the 4-way
+    // pipelined fixed_key_hash4 instead of four serial calls
+    static void PRF4(const WireLabel key1s[4], const WireLabel key2s[4],
+                     uint32_t gate_id, WireLabel out[4]);
+
     // Encrypt wire label using two input keys
-    static std::vector<uint8_t> encrypt_label(const WireLabel& output_label, 
-                                            const WireLabel& key1, 
-                                            const WireLabel& key2, 
+    static std::vector<uint8_t> encrypt_label(const WireLabel& output_label,
+                                            const WireLabel& key1,
+                                            const WireLabel& key2,
                                             uint32_t gate_id);
+
+    // Encrypt all four rows of one garbled table, deriving the row keys
+    // 4-wide via PRF4
+    static void encrypt_label4(const WireLabel output_labels[4],
+                               const WireLabel key1s[4],
+                               const WireLabel key2s[4],
+                               uint32_t gate_id,
+                               std::vector<uint8_t> ciphertexts[4]);
     
     // Decrypt to recover wire label
     static WireLabel decrypt_label(const std::vector<uint8_t>& ciphertext,
                                  const WireLabel& key1,
                                  const WireLabel& key2,
                                  uint32_t gate_id);
+
+    // Trial-decrypt the four rows of one garbled table with a single
+    // row-key derivation — every row of a gate shares PRF(key1, key2,
+    // gate_id), so trying rows one decrypt_label call at a time redoes
+    // the same AES hash chains up to four times.  Writes the recovered
+    // label to out and returns the row index, or -1 if no row passes the
+    // padding check.
+    static int try_decrypt_rows(const std::array<std::vector<uint8_t>, 4>& rows,
+                                const WireLabel& key1,
+                                const WireLabel& key2,
+                                uint32_t gate_id,
+                                WireLabel& out);
     
     // Check if decryption was successful (padding verification)
     static bool is_valid_decryption(const std::vector<uint8_t>& decrypted_data);
@@ -50,6 +107,25 @@ public:
     
     // Hash function for general use
     static std::vector<uint8_t> sha256(const std::vector<uint8_t>& data);
+
+    // Fixed-key AES hash of a wire label (see AESFixedKey)
+    static WireLabel fixed_key_hash(const WireLabel& x, uint64_t tweak);
+
+    // Carry-less multiplication in GF(2^128) with the GHASH reduction
+    // polynomial x^128 + x^7 + x^2 + x + 1.  Building block for
+    // authenticated (malicious-secure) garbling, where each garbled row
+    // carries an information-theoretic MAC over the label field.
+    static WireLabel gf128_mul(const WireLabel& a, const WireLabel& b);
+
+    // Polynomial MAC over GF(2^128): acc = (acc ^ block) * key per block,
+    // as in GHASH.  One PCLMUL sequence per 16-byte block instead of a
+    // full SHA-256 compression.
+    static WireLabel gf128_mac(const WireLabel& key,
+                               const std::vector<WireLabel>& blocks);
+
+    // Pipelined 4-way variant of fixed_key_hash
+    static void fixed_key_hash4(const WireLabel in[4], const uint64_t tweaks[4],
+                                WireLabel out[4]);
     
     // Serialize wire label to bytes
     static std::vector<uint8_t> serialize_label(const WireLabel& label);
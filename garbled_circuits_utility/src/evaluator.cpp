@@ -19,11 +19,28 @@ public:
     EvaluatorProgram() : hostname("localhost"), port(DEFAULT_PORT) {}
     
     int run(int argc, char* argv[]) {
+        if (!parse_arguments(argc, argv)) {
+            return 1;
+        }
+        return run_with_options();
+    }
+
+    // Entry point for in-process harnesses (see run_evaluator_api below):
+    // same protocol run, but options are passed directly instead of argv.
+    int run_with(const std::string& host, int connect_port, const std::string& input, bool pandp) {
+        hostname = host;
+        port = connect_port;
+        input_string = input;
+        use_pandp = pandp;
+        return run_with_options();
+    }
+
+    // Stats from the most recent evaluation (for the C API)
+    Evaluator::EvaluationStats get_last_stats() const { return last_stats; }
+
+private:
+    int run_with_options() {
         try {
-            if (!parse_arguments(argc, argv)) {
-                return 1;
-            }
-                        
             // Parse evaluator inputs
             auto evaluator_inputs = parse_inputs();
             
@@ -48,6 +65,7 @@ private:
     std::string input_string;
     int port;
     bool use_pandp = false;
+    Evaluator::EvaluationStats last_stats;
     
     
     bool parse_arguments(int argc, char* argv[]) {
@@ -87,23 +105,7 @@ private:
     }
     
     std::vector<bool> parse_inputs() {
-        std::vector<bool> inputs;
-        
-        if (input_string.empty()) {
-            return inputs;
-        }
-        
-        for (char c : input_string) {
-            if (c == '0') {
-                inputs.push_back(false);
-            } else if (c == '1') {
-                inputs.push_back(true);
-            } else if (c != ' ' && c != ',') {
-                throw std::invalid_argument("Invalid input bit: " + std::string(1, c));
-            }
-        }
-        
-        return inputs;
+        return parse_input_bits(input_string);
     }
     
     void execute_protocol(ProtocolManager& protocol, 
@@ -170,6 +172,7 @@ private:
           << " ms" << std::endl;
         
         auto stats = evaluator.get_evaluation_stats();
+        last_stats = stats;
         std::cout << "           Successfully evaluated " << stats.gates_evaluated << " gates" << std::endl;
         std::cout << "           Decrypted " << stats.cipher_decryptions << " ciphers" << std::endl;
         std::cout << "           Evaluation time: " << stats.total_time.count() << " microseconds" << std::endl;
@@ -216,10 +219,38 @@ private:
 int main(int argc, char* argv[]) {
     // Initialize OpenSSL
     OpenSSLContext crypto_context;
-    
+
     std::cout << "Garbled Circuits Evaluator" << std::endl;
     std::cout << "================================" << std::endl;
-    
+
     EvaluatorProgram program;
     return program.run(argc, argv);
 }
+
+// C ABI entry point so in-process drivers (plot.py via ctypes on
+// libgcu.so) can run the evaluator and read the evaluation stats from
+// an out-struct instead of parsing stdout.
+extern "C" {
+
+struct GcuEvalStats {
+    long eval_time_us;
+    long decrypted;
+    long gates;
+};
+
+int run_evaluator_api(const char* host, int port, const char* input_bits,
+                      int use_pandp, GcuEvalStats* stats) {
+    OpenSSLContext crypto_context;
+    EvaluatorProgram program;
+    int rc = program.run_with(host ? host : "localhost", port,
+                              input_bits ? input_bits : "", use_pandp != 0);
+    if (rc == 0 && stats) {
+        auto s = program.get_last_stats();
+        stats->eval_time_us = s.total_time.count();
+        stats->decrypted = s.cipher_decryptions;
+        stats->gates = s.gates_evaluated;
+    }
+    return rc;
+}
+
+} // extern "C"
@@ -3,7 +3,9 @@
 #include "common.h"
 #include "crypto_utils.h"
 #include <fstream>
+#include <functional>
 #include <sstream>
+#include <string_view>
 #include <chrono>
 
 /**
@@ -30,6 +32,10 @@ public:
     
     // Parse circuit from string
     Circuit parse_circuit(const std::string& circuit_description);
+
+    // View-based variant: parses in place (no line/token copies), so a
+    // memory-mapped file can be fed directly
+    Circuit parse_circuit(std::string_view circuit_description);
     
     // Save circuit to file
     void save_circuit_to_file(const Circuit& circuit, const std::string& filename);
@@ -65,6 +71,12 @@ public:
     
     // Optimize circuit (basic optimizations)
     Circuit optimize_circuit(const Circuit& circuit);
+
+    // Renumber wires and reorder gates in topological layer order: every
+    // gate then reads ids strictly below the one it writes, and the
+    // garbler/evaluator label tables are walked nearly linearly instead
+    // of jumping across whatever ids the circuit file happened to use
+    Circuit relabel_wires_topological(const Circuit& circuit);
     
     /**
      * Example circuits
@@ -81,6 +93,13 @@ public:
     
     // Create comparison circuit (for millionaire's problem)
     static Circuit create_comparison_circuit(int bit_width);
+
+    // Fixed-width specialization: BW is a compile-time constant, so the
+    // per-bit build loop fully unrolls and every wire index constant-
+    // folds.  Instantiated for BW in {4, 8, 16, 32}; the runtime overload
+    // above dispatches to these for the common widths.
+    template <int BW>
+    static Circuit create_comparison_circuit();
     
     // Create adder circuit
     static Circuit create_adder_circuit(int bit_width);
@@ -89,7 +108,7 @@ private:
     // Helper functions for parsing
     std::vector<std::string> split_string(const std::string& str, char delimiter);
     std::string trim_string(const std::string& str);
-    void parse_circuit_line(const std::string& line, Circuit& circuit);
+    void parse_circuit_line(std::string_view line, Circuit& circuit);
     
     // Helper functions for validation
     bool check_wire_consistency(const Circuit& circuit);
@@ -114,14 +133,45 @@ public:
     
     // Garble a circuit
     GarbledCircuit garble_circuit(const Circuit& circuit);
-    
+
+    // Streaming variant for circuits too large to hold garbled: each
+    // layer's tables are written to the sink as soon as they are garbled
+    // and then discarded, so peak memory is O(widest layer) instead of
+    // O(gates).  Records stream in topological layer order as a BE u32
+    // gate id followed by the four rows, each u16 length-prefixed (the
+    // network table format).  The returned GarbledCircuit carries the
+    // label table and output mapping but has empty garbled_gates.
+    GarbledCircuit garble_circuit_stream(const Circuit& circuit, std::ostream& out);
+    
+    // Per-circuit encode/decode contexts.  Wire-id validation and label
+    // table lookups depend only on the garbled circuit, so callers that
+    // encode many input vectors against one circuit (the correctness
+    // test loop) precompute them once; the per-call work is then a
+    // bit-indexed load per input.  Contexts borrow the GarbledCircuit's
+    // label storage and must not outlive it.
+    struct EncodeContext {
+        std::vector<const std::array<WireLabel, 2>*> labels; // pair per input wire
+    };
+    struct DecodeContext {
+        std::vector<const WireLabel*> zero_labels; // 0-label per output wire
+    };
+
+    EncodeContext precompute_encode_context(const GarbledCircuit& gc,
+                                            const std::vector<int>& wire_indices);
+    DecodeContext precompute_decode_context(const GarbledCircuit& gc);
+
+    std::vector<WireLabel> encode_inputs_with(const EncodeContext& ctx,
+                                              const std::vector<bool>& inputs);
+    std::vector<bool> decode_outputs_with(const DecodeContext& ctx,
+                                          const std::vector<WireLabel>& output_labels);
+
     // Get input encoding for garbler's inputs
-    std::vector<WireLabel> encode_inputs(const GarbledCircuit& gc, 
+    std::vector<WireLabel> encode_inputs(const GarbledCircuit& gc,
                                        const std::vector<bool>& inputs,
                                        const std::vector<int>& wire_indices);
-    
+
     // Decode outputs
-    std::vector<bool> decode_outputs(const GarbledCircuit& gc, 
+    std::vector<bool> decode_outputs(const GarbledCircuit& gc,
                                    const std::vector<WireLabel>& output_labels);
     
     /**
@@ -146,18 +196,26 @@ public:
     void print_garbling_stats(const GarbledCircuit& gc);
 
 private:
-    std::map<int, std::pair<WireLabel, WireLabel>> wire_labels; // wire_id -> (label0, label1)
+    // Label pair per wire, indexed directly by wire id ([0] = label0,
+    // [1] = label1); labelled_[w] tracks which slots hold real labels
+    std::vector<std::array<WireLabel, 2>> wire_labels;
+    std::vector<uint8_t> labelled_;
+    WireLabel delta_{}; // Free-XOR global offset: label1 = label0 XOR delta (LSB forced to 1)
     bool use_pandp_ = false;
     
     // Core garbling functions
     GarbledGate garble_gate(const Gate& gate, int gate_id);
     void assign_wire_labels(const Circuit& circuit);
-    
-    // Gate-specific garbling
-    GarbledGate garble_and_gate(const Gate& gate, int gate_id);
-    GarbledGate garble_or_gate(const Gate& gate, int gate_id);
+
+    // Assign output labels for a gate if not already assigned (XOR outputs
+    // are derived from their inputs, everything else gets a fresh pair)
+    void assign_output_labels(const Gate& gate);
+
+    // Gate-specific garbling (AND/OR/NAND share the truth-table path in
+    // generate_garbled_table; only the structurally different gates keep
+    // their own routines)
+    GarbledGate garble_and_half_gate(const Gate& gate, int gate_id);
     GarbledGate garble_xor_gate(const Gate& gate, int gate_id);
-    GarbledGate garble_nand_gate(const Gate& gate, int gate_id);
     GarbledGate garble_not_gate(const Gate& gate, int gate_id);
     
     // Helper functions
@@ -190,6 +248,14 @@ public:
     // Evaluate a garbled circuit
     std::vector<WireLabel> evaluate_circuit(const GarbledCircuit& gc,
                                           const std::vector<WireLabel>& input_labels);
+
+    // In-place variant: writes the output labels into a caller-owned
+    // buffer.  The wire scratch vectors are already reused members, so
+    // with this overload a repeated-evaluation loop allocates nothing
+    // after its first iteration.
+    void evaluate_circuit_into(const GarbledCircuit& gc,
+                               const std::vector<WireLabel>& input_labels,
+                               std::vector<WireLabel>& output_labels);
     
     // Evaluate with mixed inputs (some labels, some plaintext for testing)
     std::vector<WireLabel> evaluate_with_mixed_inputs(const GarbledCircuit& gc,
@@ -232,19 +298,29 @@ public:
 
 private:
     EvaluationStats eval_stats;
-    std::map<int, WireLabel> wire_values; // wire_id -> current label
+    // Current label per wire, indexed directly by wire id (ids are dense
+    // small integers); wire_set tracks which slots actually hold a label.
+    // Bytes rather than vector<bool> so the layer-parallel loop can write
+    // distinct wires without racing on packed bits.
+    std::vector<WireLabel> wire_values;
+    std::vector<uint8_t> wire_set;
     bool use_pandp_ = false;
     
     // Core evaluation functions
-    WireLabel try_decrypt_gate(const GarbledGate& garbled_gate,
-                             const WireLabel& input1,
-                             const WireLabel& input2,
-                             int gate_id);
-    
-    WireLabel try_decrypt_unary_gate(const GarbledGate& garbled_gate,
-                                   const WireLabel& input,
-                                   int gate_id);
-    
+    WireLabel evaluate_half_gate(const GarbledGate& garbled_gate,
+                               const WireLabel& input1,
+                               const WireLabel& input2,
+                               int gate_id);
+
+    // Batched half-gate evaluation: four AND gates from one layer run
+    // their generator-half and evaluator-half hashes through the 4-way
+    // pipelined fixed_key_hash4 (two calls for four gates), filling the
+    // AES pipeline across gates instead of within one.  Reads inputs
+    // from and writes results to the wire scratch; counts below four
+    // fall back to the scalar path.
+    void evaluate_half_gates(const GarbledCircuit& gc,
+                             const int* gate_indices, size_t count);
+
     // Helper functions
     bool is_valid_gate_output(const std::vector<uint8_t>& decrypted_data);
     void update_evaluation_stats(bool success);
@@ -256,28 +332,64 @@ private:
  */
 class CircuitUtils {
 public:
-    // Plaintext evaluation (for testing)
-    static std::vector<bool> evaluate_plaintext(const Circuit& circuit, 
-                                               const std::vector<bool>& inputs);
+    // Plaintext evaluation (for testing).  Bits travel as one byte each:
+    // std::vector<bool> is a packed proxy type whose element access costs
+    // a shift/mask per bit, and returning it by value allocates per call
+    static std::vector<uint8_t> evaluate_plaintext(const Circuit& circuit,
+                                                  const std::vector<uint8_t>& inputs);
+
+    // In-place variant for hot loops: writes the output bits into a
+    // caller-owned buffer instead of allocating a fresh vector per call
+    static void evaluate_plaintext(const Circuit& circuit,
+                                   const std::vector<uint8_t>& inputs,
+                                   std::vector<uint8_t>& outputs);
+
+    // Specialize repeated plaintext evaluation of one fixed circuit: the
+    // returned callable owns dense SoA gate streams, the unary-gate
+    // rewrite, the wire sizing pass, and a scratch buffer, all computed
+    // once at compile_plaintext_evaluator time.  Each invocation is just
+    // the table-lookup gate loop over preallocated storage.  in/out are
+    // byte-per-bit arrays of num_inputs / num_outputs entries.
+    static std::function<void(const uint8_t* in, uint8_t* out)>
+    compile_plaintext_evaluator(const Circuit& circuit);
+
+    // SWAR plaintext evaluation: each WireBits word carries 64 independent
+    // test vectors (bit j = assignment j), evaluated in a single pass
+    static std::vector<WireBits> evaluate_plaintext_packed(const Circuit& circuit,
+                                                          const std::vector<WireBits>& inputs);
+
+    // 256-lane bit-sliced variant: one AVX2 op per gate evaluates 256 test
+    // vectors (falls back to four scalar words when the CPU lacks AVX2)
+    static std::vector<WireBits256> evaluate_plaintext_bitsliced(const Circuit& circuit,
+                                                                const std::vector<WireBits256>& inputs);
     
     // Compare garbled and plaintext evaluation results
     static bool verify_evaluation(const Circuit& circuit,
-                                const std::vector<bool>& inputs,
-                                const std::vector<bool>& garbled_output);
-    
-    // Generate random test inputs
-    static std::vector<bool> generate_random_inputs(size_t num_inputs);
+                                const std::vector<uint8_t>& inputs,
+                                const std::vector<uint8_t>& garbled_output);
+
+    // Generate random test inputs (one byte per bit, see evaluate_plaintext)
+    static std::vector<uint8_t> generate_random_inputs(size_t num_inputs);
     
     // Convert between different representations
     static std::vector<bool> labels_to_bits(const std::vector<WireLabel>& labels,
                                            const GarbledCircuit& gc);
     
     static std::vector<bool> int_to_bits(int value, int bit_width);
+    // In-place variant for hot loops: overwrites a caller-owned buffer
+    // instead of allocating a fresh vector per call
+    static void int_to_bits(int value, int bit_width, std::vector<bool>& bits);
     static int bits_to_int(const std::vector<bool>& bits);
     
     // Circuit testing
-    static bool test_circuit_correctness(const Circuit& circuit, 
+    static bool test_circuit_correctness(const Circuit& circuit,
                                        size_t num_tests = 100);
+
+    // Topological layer index: layers[d] holds the indices of all gates at
+    // depth d (every input produced by depth < d).  Computed once with
+    // Kahn's algorithm; gates within one layer are mutually independent.
+    // Throws if the circuit has a cycle or reads an undefined wire.
+    static std::vector<std::vector<int>> compute_topological_layers(const Circuit& circuit);
     
     // Print functions
     static void print_circuit(const Circuit& circuit);
@@ -20,11 +20,25 @@ public:
     GarblerProgram() : port(DEFAULT_PORT) {}
     
     int run(int argc, char* argv[]) {
+        if (!parse_arguments(argc, argv)) {
+            return 1;
+        }
+        return run_with_options();
+    }
+
+    // Entry point for in-process harnesses (see run_garbler_api below):
+    // same protocol run, but options are passed directly instead of argv.
+    int run_with(const std::string& circuit, const std::string& input, int listen_port, bool pandp) {
+        circuit_file = circuit;
+        input_string = input;
+        port = listen_port;
+        use_pandp = pandp;
+        return run_with_options();
+    }
+
+private:
+    int run_with_options() {
         try {
-            if (!parse_arguments(argc, argv)) {
-                return 1;
-            }
-                        
             auto t0 = std::chrono::high_resolution_clock::now();
             // Load circuit
             auto circuit = load_circuit();
@@ -44,8 +58,8 @@ public:
             std::cout << "[TIME] Garbled circuit in " << garble_ms << " ms" << std::endl;
             
             // Set up network connection
-            auto connection = std::make_unique<SocketConnection>(port);
-            connection->wait_for_client();
+            ServerListener listener(port);
+            auto connection = listener.accept_connection();
             
             auto protocol = ProtocolManager(std::move(connection));
             
@@ -116,23 +130,7 @@ private:
     }
     
     std::vector<bool> parse_inputs() {
-        std::vector<bool> inputs;
-        
-        if (input_string.empty()) {
-            return inputs;
-        }
-        
-        for (char c : input_string) {
-            if (c == '0') {
-                inputs.push_back(false);
-            } else if (c == '1') {
-                inputs.push_back(true);
-            } else if (c != ' ' && c != ',') {
-                throw std::invalid_argument("Invalid input bit: " + std::string(1, c));
-            }
-        }
-        
-        return inputs;
+        return parse_input_bits(input_string);
     }
     
     void execute_protocol(ProtocolManager& protocol, 
@@ -154,7 +152,11 @@ private:
         std::cout << " (decimal: " << CircuitUtils::bits_to_int(garbler_inputs) << ")" << std::endl;
         if (use_pandp) std::cout << "Point-and-Permute: ENABLED" << std::endl;
         
-        // Step 1: Send garbled circuit
+        // Step 1: Send garbled circuit.  The circuit and the input labels
+        // go out back to back with no response in between, so cork the
+        // socket across both and let the kernel pack them into full
+        // segments.
+    protocol.begin_batch();
     std::cout << "\n[STEP 1] Sending garbled circuit to evaluator..." << std::endl;
     auto s0 = std::chrono::high_resolution_clock::now();
     protocol.send_circuit(gc);
@@ -180,6 +182,7 @@ private:
                       << " ms" << std::endl;
             std::cout << "           Sent " << garbler_labels.size() << " wire labels for garbler's inputs" << std::endl;
         }
+        protocol.end_batch();
         
         // Step 3: Perform OT for evaluator's inputs
         size_t evaluator_input_count = gc.circuit.num_inputs - garbler_inputs.size();
@@ -274,10 +277,21 @@ private:
 int main(int argc, char* argv[]) {
     // Initialize OpenSSL
     OpenSSLContext crypto_context;
-    
+
     std::cout << "Garbled Circuits Garbler" << std::endl;
     std::cout << "==============================" << std::endl;
-    
+
     GarblerProgram program;
     return program.run(argc, argv);
 }
+
+// C ABI entry point so in-process drivers (plot.py via ctypes on
+// libgcu.so) can run the garbler without a fork+execve per session.
+extern "C" int run_garbler_api(const char* circuit_file, const char* input_bits,
+                               int port, int use_pandp) {
+    OpenSSLContext crypto_context;
+    GarblerProgram program;
+    return program.run_with(circuit_file ? circuit_file : "",
+                            input_bits ? input_bits : "",
+                            port, use_pandp != 0);
+}
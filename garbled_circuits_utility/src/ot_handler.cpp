@@ -9,89 +9,100 @@
 
 using namespace osuCrypto;
 
+// A label and a block are both exactly one 128-bit register; move them
+// with a single load/store pair instead of a size-parameterized memcpy
+static_assert(WIRE_LABEL_SIZE == 16 && sizeof(block) == 16,
+              "labels and OT blocks are 128-bit");
+
+static inline void copy16(void* dst, const void* src) {
+    _mm_storeu_si128(static_cast<__m128i*>(dst),
+                     _mm_loadu_si128(static_cast<const __m128i*>(src)));
+}
+
 block OTHandler::wire_label_to_block(const WireLabel& label) {
-    block b{};
-    std::memcpy(&b, label.data(), std::min<size_t>(16, label.size()));
+    block b;
+    copy16(&b, label.data());
     return b;
 }
 
 WireLabel OTHandler::block_to_wire_label(const block& b) {
-    WireLabel wl{0};
-    std::memcpy(wl.data(), &b, std::min(sizeof(block), wl.size()));
+    WireLabel wl;
+    copy16(wl.data(), &b);
     return wl;
 }
 
 OTHandler::OTHandler()
-    : initialized(false), is_sender(false), total_ots_performed(0), prng(nullptr) {}
+    : state(State::Uninit), total_ots_performed(0), prng(nullptr) {}
 
 OTHandler::~OTHandler() { cleanup(); }
 
 OTHandler::OTHandler(OTHandler&& other) noexcept
-    : initialized(other.initialized), is_sender(other.is_sender), total_ots_performed(other.total_ots_performed), prng(std::move(other.prng)) {
-    other.initialized = false; other.is_sender = false; other.total_ots_performed = 0;
+    : state(other.state), total_ots_performed(other.total_ots_performed), prng(std::move(other.prng)) {
+    other.state = State::Uninit; other.total_ots_performed = 0;
 }
 
 OTHandler& OTHandler::operator=(OTHandler&& other) noexcept {
     if (this != &other) {
         cleanup();
-        initialized = other.initialized;
-        is_sender = other.is_sender;
+        state = other.state;
         total_ots_performed = other.total_ots_performed;
         prng = std::move(other.prng);
-        other.initialized = false; other.is_sender = false; other.total_ots_performed = 0;
+        other.state = State::Uninit; other.total_ots_performed = 0;
     }
     return *this;
 }
 
 void OTHandler::init_sender(SocketConnection& connection) {
-    if (initialized) throw OTException("OTHandler already initialized");
+    if (state != State::Uninit) throw OTException("OTHandler already initialized");
     if (!connection.is_connected()) throw OTException("Sender socket not connected");
     prng = std::make_unique<PRNG>(sysRandomSeed());
-    is_sender = true;
-    initialized = true;
+    state = State::Sender;
     LOG_INFO("SimplestOT sender initialized");
 }
 
 void OTHandler::init_receiver(SocketConnection& connection) {
-    if (initialized) throw OTException("OTHandler already initialized");
+    if (state != State::Uninit) throw OTException("OTHandler already initialized");
     if (!connection.is_connected()) throw OTException("Receiver socket not connected");
     prng = std::make_unique<PRNG>(sysRandomSeed());
-    is_sender = false;
-    initialized = true;
+    state = State::Receiver;
     LOG_INFO("SimplestOT receiver initialized");
 }
 
 bool OTHandler::send_ot(const std::vector<std::pair<WireLabel, WireLabel>>& pairs, SocketConnection& connection) {
-    if (!initialized || !is_sender) throw OTException("OT sender not properly initialized");
+    if (state != State::Sender) throw OTException("OT sender not properly initialized");
     if (pairs.empty()) return true;
     auto ep = resolve_endpoint();
-    // Run base OTs to get random blocks
+    // Run OTs to get random blocks: per-pair public-key OT for small
+    // batches, IKNP extension (base OTs once, then two hashes and a few
+    // XORs per pair) when the batch is large enough to amortize it
     std::vector<std::array<block,2>> otBlocks(pairs.size());
-    simplest_ot_send(pairs.size(), otBlocks, ep);
+    if (pairs.size() > OT_EXTENSION_THRESHOLD) {
+        iknp_ot_send(pairs.size(), otBlocks, ep);
+    } else {
+        simplest_ot_send(pairs.size(), otBlocks, ep);
+    }
     // Mask provided labels with KDF(H(block||role||index||bit))
-    std::vector<std::array<WireLabel,2>> masked(pairs.size());
+    std::vector<WireLabel> masked(2 * pairs.size());
     kdf_mask_labels(pairs, otBlocks, masked);
-    // Send masked pairs sequentially over existing application socket
-    for (size_t i=0;i<masked.size();++i) {
-        SocketUtils::send_wire_label(connection.get_socket(), masked[i][0]);
-        SocketUtils::send_wire_label(connection.get_socket(), masked[i][1]);
-    }
+    // One bulk send for the whole batch instead of 2N tiny messages
+    SocketUtils::send_wire_labels(connection.get_socket(), masked);
     total_ots_performed += pairs.size();
     return true;
 }
 
 std::vector<WireLabel> OTHandler::receive_ot(const std::vector<bool>& choices, SocketConnection& connection) {
-    if (!initialized || is_sender) throw OTException("OT receiver not properly initialized");
+    if (state != State::Receiver) throw OTException("OT receiver not properly initialized");
     if (choices.empty()) return {};
     auto ep = resolve_endpoint();
     std::vector<block> recvBlocks(choices.size());
-    simplest_ot_receive(choices.size(), choices, recvBlocks, ep);
-    // Receive masked pairs
-    std::vector<std::array<WireLabel,2>> masked(choices.size());
-    for (size_t i=0;i<choices.size();++i) {
-        masked[i][0] = SocketUtils::receive_wire_label(connection.get_socket());
-        masked[i][1] = SocketUtils::receive_wire_label(connection.get_socket());
+    if (choices.size() > OT_EXTENSION_THRESHOLD) {
+        iknp_ot_receive(choices.size(), choices, recvBlocks, ep);
+    } else {
+        simplest_ot_receive(choices.size(), choices, recvBlocks, ep);
     }
+    // Receive all masked pairs in one bulk read
+    std::vector<WireLabel> masked =
+        SocketUtils::receive_wire_labels(connection.get_socket(), 2 * choices.size());
     std::vector<WireLabel> out; out.reserve(choices.size());
     derive_chosen_labels(masked, recvBlocks, choices, out);
     total_ots_performed += choices.size();
@@ -100,7 +111,7 @@ std::vector<WireLabel> OTHandler::receive_ot(const std::vector<bool>& choices, S
 
 void OTHandler::reset() {
     cleanup();
-    initialized = false; is_sender = false; total_ots_performed = 0;
+    state = State::Uninit; total_ots_performed = 0;
 }
 
 void OTHandler::cleanup() { prng.reset(); }
@@ -136,6 +147,34 @@ void OTHandler::simplest_ot_receive(size_t n, const std::vector<bool>& choices,
 #endif
 }
 
+void OTHandler::iknp_ot_send(size_t n, std::vector<std::array<block,2>>& outPairs, const std::string& endpoint) {
+#ifdef COPROTO_ENABLE_BOOST
+    IknpOtExtSender sender;
+    auto sock = coproto::asioConnect(endpoint, true);
+    coproto::sync_wait(sender.genBaseOts(*prng, sock));
+    coproto::sync_wait(sender.send(outPairs, *prng, sock));
+    coproto::sync_wait(sock.flush());
+#else
+    (void)n; (void)outPairs; (void)endpoint;
+    throw OTException("IKNP extension requires coproto Boost build");
+#endif
+}
+
+void OTHandler::iknp_ot_receive(size_t n, const std::vector<bool>& choices, std::vector<block>& outMsgs, const std::string& endpoint) {
+#ifdef COPROTO_ENABLE_BOOST
+    IknpOtExtReceiver recv;
+    auto sock = coproto::asioConnect(endpoint, false);
+    coproto::sync_wait(recv.genBaseOts(*prng, sock));
+    BitVector choiceBits(n);
+    for (size_t i=0;i<n;++i) choiceBits[i] = choices[i];
+    coproto::sync_wait(recv.receive(choiceBits, outMsgs, *prng, sock));
+    coproto::sync_wait(sock.flush());
+#else
+    (void)n; (void)choices; (void)outMsgs; (void)endpoint;
+    throw OTException("IKNP extension requires coproto Boost build");
+#endif
+}
+
 static void sha256_block_mask(const block& b, uint8_t tweak, size_t index, uint8_t which, uint8_t* out, size_t outLen){
     // Simple KDF = SHA256(b || tweak || index || which)
     uint8_t input[16 + 1 + 8 + 1];
@@ -148,35 +187,98 @@ static void sha256_block_mask(const block& b, uint8_t tweak, size_t index, uint8
     std::memcpy(out, hash, outLen);
 }
 
+// OT masks live in their own tweak space, disjoint from the garbling
+// tweaks (2g, 2g+1) and the PRF tweaks (0x8000...|gate_id)
+static constexpr uint64_t OT_MASK_TWEAK = 0x4000000000000000ULL;
+
+static inline uint64_t ot_mask_tweak(size_t index, uint8_t which) {
+    return OT_MASK_TWEAK | (static_cast<uint64_t>(index) << 1) | which;
+}
+
+static inline bool have_aesni() {
+    static const bool v = __builtin_cpu_supports("aes");
+    return v;
+}
+
+// Derive the label mask from an OT block: fixed-key AES hash (one AES
+// round chain per label, same primitive the garbler uses per gate)
+// when the CPU has AES-NI, SHA-256 KDF otherwise.  Both parties must
+// take the same branch for the masks to agree; in practice they do,
+// because evaluating a garbled circuit already requires the fixed-key
+// AES hash on both machines, so the SHA path only matters for matched
+// legacy hosts.  OpenSSL's SHA256 dispatches to SHA-NI at runtime
+// where the CPU has it, so the fallback is hardware-accelerated too.
+static WireLabel ot_block_mask(const block& b, size_t index, uint8_t which) {
+    WireLabel mask{};
+    if (have_aesni()) {
+        WireLabel x;
+        copy16(x.data(), &b);
+        mask = CryptoUtils::fixed_key_hash(x, ot_mask_tweak(index, which));
+    } else {
+        sha256_block_mask(b, 0xA5, index, which, mask.data(), mask.size());
+    }
+    return mask;
+}
+
 void OTHandler::kdf_mask_labels(const std::vector<std::pair<WireLabel,WireLabel>>& in,
                                 const std::vector<std::array<block,2>>& otBlocks,
-                                std::vector<std::array<WireLabel,2>>& masked) const {
+                                std::vector<WireLabel>& masked) const {
     if (in.size() != otBlocks.size()) throw OTException("kdf size mismatch");
-    if (masked.size() != in.size()) masked.resize(in.size());
-    for (size_t i=0;i<in.size();++i){
-        for (int bit=0; bit<2; ++bit){
-            WireLabel mask{};
-            sha256_block_mask(otBlocks[i][bit], 0xA5, i, (uint8_t)bit, mask.data(), mask.size());
-            const WireLabel& src = (bit == 0 ? in[i].first : in[i].second);
-            for (size_t j=0;j<mask.size();++j){
-                masked[i][bit][j] = src[j] ^ mask[j];
+    if (masked.size() != 2 * in.size()) masked.resize(2 * in.size());
+
+    size_t i = 0;
+    if (have_aesni()) {
+        // Two indices per step = four independent AES chains, pipelined
+        // the same way the garbler pipelines its per-gate hashes; steps
+        // write disjoint masked slots, so they also parallelize cleanly
+        ptrdiff_t steps = static_cast<ptrdiff_t>(in.size() / 2);
+        #pragma omp parallel for schedule(static)
+        for (ptrdiff_t step = 0; step < steps; ++step) {
+            size_t i = 2 * static_cast<size_t>(step);
+            WireLabel xs[4];
+            uint64_t tweaks[4];
+            for (int k = 0; k < 4; ++k) {
+                size_t idx = i + (k >> 1);
+                uint8_t bit = k & 1;
+                copy16(xs[k].data(), &otBlocks[idx][bit]);
+                tweaks[k] = ot_mask_tweak(idx, bit);
             }
+            WireLabel masks[4];
+            CryptoUtils::fixed_key_hash4(xs, tweaks, masks);
+            masked[2*i]   = CryptoUtils::xor_labels(in[i].first, masks[0]);
+            masked[2*i+1] = CryptoUtils::xor_labels(in[i].second, masks[1]);
+            masked[2*i+2] = CryptoUtils::xor_labels(in[i+1].first, masks[2]);
+            masked[2*i+3] = CryptoUtils::xor_labels(in[i+1].second, masks[3]);
         }
+        i = 2 * static_cast<size_t>(steps);
+    }
+    for (; i < in.size(); ++i) {
+        masked[2*i]   = CryptoUtils::xor_labels(in[i].first, ot_block_mask(otBlocks[i][0], i, 0));
+        masked[2*i+1] = CryptoUtils::xor_labels(in[i].second, ot_block_mask(otBlocks[i][1], i, 1));
     }
 }
 
-void OTHandler::derive_chosen_labels(const std::vector<std::array<WireLabel,2>>& masked,
+void OTHandler::derive_chosen_labels(const std::vector<WireLabel>& masked,
                                      const std::vector<block>& recvBlocks,
                                      const std::vector<bool>& choices,
                                      std::vector<WireLabel>& out) const {
-    if (masked.size() != recvBlocks.size()) throw OTException("derive size mismatch");
-    out.resize(masked.size());
-    for (size_t i=0;i<masked.size();++i){
+    if (masked.size() != 2 * recvBlocks.size()) throw OTException("derive size mismatch");
+    out.resize(recvBlocks.size());
+    // Each index owns its out slot, so the unmask loop runs in parallel
+    #pragma omp parallel for schedule(static)
+    for (size_t i=0;i<recvBlocks.size();++i){
         bool c = choices[i];
-        WireLabel mask{};
-        sha256_block_mask(recvBlocks[i], 0xA5, i, (uint8_t)c, mask.data(), mask.size());
-        for(size_t j=0;j<mask.size();++j){
-            out[i][j] = masked[i][c][j] ^ mask[j];
-        }
+        WireLabel mask = ot_block_mask(recvBlocks[i], i, (uint8_t)c);
+        // Constant-time select of the chosen row: an all-ones/all-zeros
+        // byte mask blends both candidates instead of indexing by the
+        // secret choice bit, so neither branch predictor nor cache line
+        // touched depends on c
+        static_assert(WIRE_LABEL_SIZE == 16, "one label per SSE register");
+        __m128i row0 = _mm_loadu_si128(reinterpret_cast<const __m128i*>(masked[2*i].data()));
+        __m128i row1 = _mm_loadu_si128(reinterpret_cast<const __m128i*>(masked[2*i+1].data()));
+        __m128i sel = _mm_set1_epi8(-static_cast<int8_t>(c));
+        __m128i chosen = _mm_or_si128(_mm_andnot_si128(sel, row0), _mm_and_si128(sel, row1));
+        __m128i m = _mm_loadu_si128(reinterpret_cast<const __m128i*>(mask.data()));
+        _mm_storeu_si128(reinterpret_cast<__m128i*>(out[i].data()), _mm_xor_si128(chosen, m));
     }
 }
\ No newline at end of file
@@ -5,6 +5,8 @@
 
 #include </mnt/c/Users/saini/Downloads/UGP/coproto/coproto/coproto.h>
 #include </mnt/c/Users/saini/Downloads/UGP/libOTe/libOTe/Base/SimplestOT.h>
+#include </mnt/c/Users/saini/Downloads/UGP/libOTe/libOTe/TwoChooseOne/Iknp/IknpOtExtSender.h>
+#include </mnt/c/Users/saini/Downloads/UGP/libOTe/libOTe/TwoChooseOne/Iknp/IknpOtExtReceiver.h>
 #include </mnt/c/Users/saini/Downloads/UGP/libOTe/cryptoTools/cryptoTools/Common/Defines.h>
 #include </mnt/c/Users/saini/Downloads/UGP/libOTe/cryptoTools/cryptoTools/Common/BitVector.h>
 #include </mnt/c/Users/saini/Downloads/UGP/libOTe/cryptoTools/cryptoTools/Crypto/PRNG.h>
@@ -53,14 +55,17 @@ public:
      * Utility functions
      */
     void reset();
-    bool is_initialized() const { return initialized; }
-    bool is_sender_role() const { return is_sender; }
+    bool is_initialized() const { return state != State::Uninit; }
+    bool is_sender_role() const { return state == State::Sender; }
     
     size_t get_total_ots() const { return total_ots_performed; }
     
 private:
-    bool initialized;
-    bool is_sender;
+    // One field answers both "initialized?" and "which role?", so the
+    // per-call guards are a single load and compare
+    enum class State : uint8_t { Uninit, Sender, Receiver };
+
+    State state;
     size_t total_ots_performed;
     std::unique_ptr<PRNG> prng;
 
@@ -69,14 +74,23 @@ private:
     block wire_label_to_block(const WireLabel& label);
     WireLabel block_to_wire_label(const block& blk);
 
-    // Endpoint resolution for Asio-based SimplestOT (env GC_OT_ENDPOINT or default 127.0.0.1:9100)
+    // Past this batch size the ~128 base OTs of IKNP extension are
+    // cheaper than running one public-key OT per pair (both sides
+    // derive the same decision from the batch size)
+    static constexpr size_t OT_EXTENSION_THRESHOLD = 128;
+
+    // Endpoint resolution for Asio-based OT protocols (env GC_OT_ENDPOINT or default 127.0.0.1:9100)
     std::string resolve_endpoint() const;
     void simplest_ot_send(size_t n, std::vector<std::array<block,2>>& outPairs, const std::string& endpoint);
     void simplest_ot_receive(size_t n, const std::vector<bool>& choices, std::vector<block>& outMsgs, const std::string& endpoint);
+    void iknp_ot_send(size_t n, std::vector<std::array<block,2>>& outPairs, const std::string& endpoint);
+    void iknp_ot_receive(size_t n, const std::vector<bool>& choices, std::vector<block>& outMsgs, const std::string& endpoint);
+    // Masked pairs travel as one flat label vector (pair i at slots
+    // 2i/2i+1) so the whole batch is a single bulk send on the wire
     void kdf_mask_labels(const std::vector<std::pair<WireLabel,WireLabel>>& in,
                          const std::vector<std::array<block,2>>& otBlocks,
-                         std::vector<std::array<WireLabel,2>>& masked) const;
-    void derive_chosen_labels(const std::vector<std::array<WireLabel,2>>& masked,
+                         std::vector<WireLabel>& masked) const;
+    void derive_chosen_labels(const std::vector<WireLabel>& masked,
                               const std::vector<block>& recvBlocks,
                               const std::vector<bool>& choices,
                               std::vector<WireLabel>& out) const;
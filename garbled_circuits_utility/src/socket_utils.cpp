@@ -1,8 +1,217 @@
 #include "socket_utils.h"
+#include <cstdlib>
 #include <cstring>
 #include <stdexcept>
 #include <errno.h>
 #include <sstream>
+#include <sys/uio.h>
+#include <netinet/tcp.h>
+#include <algorithm>
+#include <climits>
+
+// io_uring backend: used when liburing is available at build time and
+// the kernel accepts ring setup at runtime; otherwise the plain
+// send/recv/writev syscalls below are used unchanged.
+#if defined(__has_include)
+#  if __has_include(<liburing.h>)
+#    include <liburing.h>
+#    define GC_HAVE_LIBURING 1
+#  endif
+#endif
+
+// Optional LZ4 backend: when liblz4 is available the circuit topology
+// section (counts, wire ids, gate tuples — highly regular data) is
+// compressed before send.  The garbled tables are ciphertext and do not
+// compress, so they always go out raw.
+#if defined(__has_include)
+#  if __has_include(<lz4.h>)
+#    include <lz4.h>
+#    define GC_HAVE_LZ4 1
+#  endif
+#endif
+
+namespace {
+
+#ifdef GC_HAVE_LIBURING
+
+// One small ring per protocol thread.  I/O here is synchronous
+// (submit one op, wait for its completion), so the ring's value is the
+// unified submission path and the door it opens to batched label sends;
+// SQPOLL and registered buffers need privileges and pinned memory that
+// a utility like this should not demand.
+struct UringContext {
+    struct io_uring ring;
+    bool ok = false;
+
+    UringContext() {
+        // Each ring is thread-local and only ever touched from its owning
+        // thread, so ask the kernel to defer task work to reap time
+        // (DEFER_TASKRUN requires SINGLE_ISSUER).  Older kernels reject
+        // the flags, so fall back to a plain ring.
+#if defined(IORING_SETUP_DEFER_TASKRUN) && defined(IORING_SETUP_SINGLE_ISSUER)
+        ok = io_uring_queue_init(64, &ring,
+                                 IORING_SETUP_SINGLE_ISSUER |
+                                 IORING_SETUP_DEFER_TASKRUN) == 0;
+        if (!ok)
+#endif
+        ok = io_uring_queue_init(64, &ring, 0) == 0;
+    }
+
+    ~UringContext() {
+        if (ok) {
+            io_uring_queue_exit(&ring);
+        }
+    }
+};
+
+thread_local UringContext uring;
+
+// Submit the already-prepared SQE and wait for its completion, giving
+// the op syscall-like semantics (result or -1 with errno set)
+ssize_t uring_submit_and_reap() {
+    int ret = io_uring_submit_and_wait(&uring.ring, 1);
+    if (ret < 0) {
+        errno = -ret;
+        return -1;
+    }
+
+    struct io_uring_cqe* cqe = nullptr;
+    ret = io_uring_wait_cqe(&uring.ring, &cqe);
+    if (ret < 0) {
+        errno = -ret;
+        return -1;
+    }
+
+    ssize_t res = cqe->res;
+    io_uring_cqe_seen(&uring.ring, cqe);
+    if (res < 0) {
+        errno = static_cast<int>(-res);
+        return -1;
+    }
+    return res;
+}
+
+#if defined(IORING_CQE_F_NOTIF) && defined(IO_URING_VERSION_MAJOR)
+#    define GC_HAVE_SEND_ZC 1
+
+// Copies into the kernel socket buffer dominate send cost only for
+// large buffers; below this, pinning pages for zero-copy costs more
+// than the memcpy it saves
+constexpr size_t ZC_SEND_THRESHOLD = 64 * 1024;
+
+// Zero-copy send: the kernel pins the caller's pages and the NIC reads
+// them directly, skipping the copy into the socket buffer.  Still
+// synchronous: we wait for both the result CQE and the trailing
+// notification CQE (the kernel's "pages no longer referenced" signal)
+// before returning, so the caller may reuse the buffer immediately.
+ssize_t uring_send_zc(int fd, const void* buf, size_t len) {
+    struct io_uring_sqe* sqe = io_uring_get_sqe(&uring.ring);
+    if (!sqe) {
+        errno = EAGAIN;
+        return -1;
+    }
+    io_uring_prep_send_zc(sqe, fd, buf, len, MSG_NOSIGNAL, 0);
+
+    int ret = io_uring_submit(&uring.ring);
+    if (ret < 0) {
+        errno = -ret;
+        return -1;
+    }
+
+    ssize_t res = -1;
+    bool expect_notif = false;
+    do {
+        struct io_uring_cqe* cqe = nullptr;
+        ret = io_uring_wait_cqe(&uring.ring, &cqe);
+        if (ret < 0) {
+            errno = -ret;
+            return -1;
+        }
+        if (cqe->flags & IORING_CQE_F_NOTIF) {
+            expect_notif = false;
+        } else {
+            res = cqe->res;
+            expect_notif = (cqe->flags & IORING_CQE_F_MORE) != 0;
+        }
+        io_uring_cqe_seen(&uring.ring, cqe);
+    } while (expect_notif);
+
+    if (res < 0) {
+        errno = static_cast<int>(-res);
+        return -1;
+    }
+    return res;
+}
+#endif // SEND_ZC support
+
+#endif // GC_HAVE_LIBURING
+
+// Syscall-shaped wrappers that prefer the ring when it is usable
+ssize_t net_send(int fd, const void* buf, size_t len) {
+#ifdef GC_HAVE_LIBURING
+    if (uring.ok) {
+#ifdef GC_HAVE_SEND_ZC
+        if (len >= ZC_SEND_THRESHOLD) {
+            ssize_t zc = uring_send_zc(fd, buf, len);
+            // EINVAL/EOPNOTSUPP: kernel predates SEND_ZC — use the
+            // copying path; anything else is a real send result
+            if (zc >= 0 || (errno != EINVAL && errno != EOPNOTSUPP)) {
+                return zc;
+            }
+        }
+#endif
+        struct io_uring_sqe* sqe = io_uring_get_sqe(&uring.ring);
+        if (sqe) {
+            io_uring_prep_send(sqe, fd, buf, len, MSG_NOSIGNAL);
+            return uring_submit_and_reap();
+        }
+    }
+#endif
+    return send(fd, buf, len, MSG_NOSIGNAL);
+}
+
+ssize_t net_writev(int fd, struct iovec* iov, int iov_count) {
+#ifdef GC_HAVE_LIBURING
+    if (uring.ok) {
+        struct io_uring_sqe* sqe = io_uring_get_sqe(&uring.ring);
+        if (sqe) {
+            io_uring_prep_writev(sqe, fd, iov, iov_count, 0);
+            return uring_submit_and_reap();
+        }
+    }
+#endif
+    return writev(fd, iov, iov_count);
+}
+
+ssize_t net_recv(int fd, void* buf, size_t len, int flags = 0) {
+#ifdef GC_HAVE_LIBURING
+    if (uring.ok) {
+        struct io_uring_sqe* sqe = io_uring_get_sqe(&uring.ring);
+        if (sqe) {
+            io_uring_prep_recv(sqe, fd, buf, len, flags);
+            return uring_submit_and_reap();
+        }
+    }
+#endif
+    return recv(fd, buf, len, flags);
+}
+
+} // namespace
+
+namespace {
+
+// The protocol is strictly request/response with many small writes
+// (5-byte headers, 16-byte labels); Nagle's algorithm makes those wait
+// on delayed ACKs, adding up to ~40 ms per exchange.  Disable it on
+// every communication socket.
+void disable_nagle(int socket) {
+    int one = 1;
+    if (setsockopt(socket, IPPROTO_TCP, TCP_NODELAY, &one, sizeof(one)) < 0) {
+        LOG_WARNING("Failed to set TCP_NODELAY: " << std::strerror(errno));
+    }
+}
+
+} // namespace
 
 int SocketUtils::create_server_socket(int port) {
     int server_socket = socket(AF_INET, SOCK_STREAM, 0);
@@ -46,7 +255,10 @@ int SocketUtils::accept_client(int server_socket) {
     if (client_socket < 0) {
         throw_network_error("accept");
     }
-    
+
+    disable_nagle(client_socket);
+    tune_for_bulk(client_socket);
+
     LOG_INFO("Client connected from " << inet_ntoa(client_address.sin_addr) 
              << ":" << ntohs(client_address.sin_port));
     return client_socket;
@@ -79,14 +291,85 @@ int SocketUtils::connect_to_server(const std::string& hostname, int port) {
         close(client_socket);
         throw_network_error("connect");
     }
-    
+
+    disable_nagle(client_socket);
+    tune_for_bulk(client_socket);
+
     LOG_INFO("Connected to server " << hostname << ":" << port);
     return client_socket;
 }
 
 void SocketUtils::send_message(int socket, const Message& message) {
-    auto serialized = serialize_message(message);
-    send_data(socket, serialized);
+    // Scatter-gather: the 5-byte header and the payload go out in one
+    // writev, without first copying the payload into a combined buffer
+    // (for a garbled circuit that copy is the whole circuit)
+    uint8_t header[5];
+    header[0] = static_cast<uint8_t>(message.type);
+    uint32_t size = message.size;
+    header[1] = (size >> 24) & 0xFF;
+    header[2] = (size >> 16) & 0xFF;
+    header[3] = (size >> 8) & 0xFF;
+    header[4] = size & 0xFF;
+
+    // Fast path for tiny messages (HELLO, GOODBYE, errors): pack header
+    // and payload into one stack buffer and issue a single plain send
+    // instead of making the kernel walk an iovec pair
+    if (message.data.size() <= 59) {
+        uint8_t packed[64];
+        std::memcpy(packed, header, sizeof(header));
+        if (!message.data.empty()) {
+            std::memcpy(packed + sizeof(header), message.data.data(), message.data.size());
+        }
+        send_all(socket, packed, sizeof(header) + message.data.size());
+        return;
+    }
+
+    struct iovec iov[2];
+    iov[0].iov_base = header;
+    iov[0].iov_len = sizeof(header);
+    iov[1].iov_base = const_cast<uint8_t*>(message.data.data());
+    iov[1].iov_len = message.data.size();
+
+    send_all_vectored(socket, iov, message.data.empty() ? 1 : 2);
+}
+
+void SocketUtils::begin_message(int socket, MessageType type, uint32_t payload_size) {
+    uint8_t header[5];
+    header[0] = static_cast<uint8_t>(type);
+    header[1] = (payload_size >> 24) & 0xFF;
+    header[2] = (payload_size >> 16) & 0xFF;
+    header[3] = (payload_size >> 8) & 0xFF;
+    header[4] = payload_size & 0xFF;
+    send_all(socket, header, sizeof(header));
+}
+
+void SocketUtils::send_message_gather(int socket, MessageType type,
+                                      std::vector<struct iovec>& iov) {
+    size_t payload_size = 0;
+    for (const auto& entry : iov) {
+        payload_size += entry.iov_len;
+    }
+
+    uint8_t header[5];
+    header[0] = static_cast<uint8_t>(type);
+    uint32_t size = static_cast<uint32_t>(payload_size);
+    header[1] = (size >> 24) & 0xFF;
+    header[2] = (size >> 16) & 0xFF;
+    header[3] = (size >> 8) & 0xFF;
+    header[4] = size & 0xFF;
+
+    struct iovec header_iov;
+    header_iov.iov_base = header;
+    header_iov.iov_len = sizeof(header);
+    iov.insert(iov.begin(), header_iov);
+
+    // writev caps the vector length at IOV_MAX, so gather in chunks
+    size_t off = 0;
+    while (off < iov.size()) {
+        int chunk = static_cast<int>(std::min<size_t>(IOV_MAX, iov.size() - off));
+        send_all_vectored(socket, iov.data() + off, chunk);
+        off += chunk;
+    }
 }
 
 Message SocketUtils::receive_message(int socket) {
@@ -105,20 +388,56 @@ Message SocketUtils::receive_message(int socket) {
         }
         data = receive_data(socket, size);
     }
-    
-    return Message(type, data);
+
+    return Message(type, std::move(data));
+}
+
+namespace {
+
+// A connection exchanges a handful of messages at a time, so a short
+// freelist per thread is enough to make round-trips allocation-free
+thread_local std::vector<std::vector<uint8_t>> buffer_free_list;
+
+constexpr size_t BUFFER_POOL_MAX = 8;
+
+} // namespace
+
+std::vector<uint8_t> BufferPool::acquire(size_t size) {
+    if (!buffer_free_list.empty()) {
+        std::vector<uint8_t> buf = std::move(buffer_free_list.back());
+        buffer_free_list.pop_back();
+        buf.resize(size);
+        return buf;
+    }
+    return std::vector<uint8_t>(size);
+}
+
+void BufferPool::release(std::vector<uint8_t>&& buf) {
+    if (buffer_free_list.size() < BUFFER_POOL_MAX) {
+        buf.clear();
+        buffer_free_list.push_back(std::move(buf));
+    }
 }
 
 void SocketUtils::send_data(int socket, const std::vector<uint8_t>& data) {
     send_all(socket, data.data(), data.size());
 }
 
+void SocketUtils::send_data_raw(int socket, const void* data, size_t size) {
+    send_all(socket, data, size);
+}
+
 std::vector<uint8_t> SocketUtils::receive_data(int socket, size_t size) {
-    std::vector<uint8_t> data(size);
+    std::vector<uint8_t> data = BufferPool::acquire(size);
     receive_all(socket, data.data(), size);
     return data;
 }
 
+void SocketUtils::receive_data(int socket, size_t size, std::vector<uint8_t>& out) {
+    out.resize(size);
+    receive_all(socket, out.data(), size);
+}
+
 void SocketUtils::send_wire_label(int socket, const WireLabel& label) {
     send_all(socket, label.data(), WIRE_LABEL_SIZE);
 }
@@ -129,23 +448,45 @@ WireLabel SocketUtils::receive_wire_label(int socket) {
     return label;
 }
 
+// A vector<WireLabel> is one contiguous run of label bytes, so batches
+// can go to and from the socket without any per-label packing
+static_assert(sizeof(WireLabel) == WIRE_LABEL_SIZE,
+              "WireLabel must have no padding for bulk label transfers");
+
 void SocketUtils::send_wire_labels(int socket, const std::vector<WireLabel>& labels) {
+    // Gather the count prefix and the labels' own storage in one writev
+    uint8_t count_header[4];
     uint32_t count = labels.size();
-    send_all(socket, &count, sizeof(count));
-    
-    for (const auto& label : labels) {
-        send_wire_label(socket, label);
-    }
+    count_header[0] = (count >> 24) & 0xFF;
+    count_header[1] = (count >> 16) & 0xFF;
+    count_header[2] = (count >> 8) & 0xFF;
+    count_header[3] = count & 0xFF;
+
+    struct iovec iov[2];
+    iov[0].iov_base = count_header;
+    iov[0].iov_len = sizeof(count_header);
+    iov[1].iov_base = const_cast<WireLabel*>(labels.data());
+    iov[1].iov_len = labels.size() * WIRE_LABEL_SIZE;
+
+    send_all_vectored(socket, iov, labels.empty() ? 1 : 2);
 }
 
 std::vector<WireLabel> SocketUtils::receive_wire_labels(int socket, size_t count) {
-    std::vector<WireLabel> labels;
-    labels.reserve(count);
-    
-    for (size_t i = 0; i < count; ++i) {
-        labels.push_back(receive_wire_label(socket));
+    // Mirror of send_wire_labels: read the count header, then all labels
+    // in one bulk receive rather than a 16-byte recv per label
+    uint8_t count_header[4];
+    receive_all(socket, count_header, 4);
+    uint32_t sent_count = (count_header[0] << 24) | (count_header[1] << 16)
+                        | (count_header[2] << 8) | count_header[3];
+    if (sent_count != count) {
+        throw NetworkException("Wire label count mismatch: expected " + std::to_string(count)
+                               + ", got " + std::to_string(sent_count));
     }
-    
+
+    // Receive straight into the labels' contiguous storage
+    std::vector<WireLabel> labels(count);
+    receive_all(socket, labels.data(), count * WIRE_LABEL_SIZE);
+
     return labels;
 }
 
@@ -155,6 +496,37 @@ void SocketUtils::close_socket(int socket) {
     }
 }
 
+void SocketUtils::tune_for_bulk(int socket) {
+    // Default kernel socket buffers (often ~208 KiB) throttle the large
+    // CIRCUIT transfer on fast links; 16 MiB covers the bandwidth-delay
+    // product of anything this utility is likely to run on.
+    // GC_SOCKBUF_BYTES overrides for unusual links.  The kernel silently
+    // caps the value at net.core.{w,r}mem_max — raise those sysctls (and
+    // consider the fq qdisc) when tuning a genuinely fast path.
+    int size = 16 * 1024 * 1024;
+    const char* env = std::getenv("GC_SOCKBUF_BYTES");
+    if (env && *env) {
+        int parsed = std::atoi(env);
+        if (parsed > 0) {
+            size = parsed;
+        }
+    }
+
+    if (setsockopt(socket, SOL_SOCKET, SO_SNDBUF, &size, sizeof(size)) < 0) {
+        LOG_WARNING("Failed to set SO_SNDBUF: " << std::strerror(errno));
+    }
+    if (setsockopt(socket, SOL_SOCKET, SO_RCVBUF, &size, sizeof(size)) < 0) {
+        LOG_WARNING("Failed to set SO_RCVBUF: " << std::strerror(errno));
+    }
+}
+
+void SocketUtils::set_cork(int socket, bool corked) {
+    int flag = corked ? 1 : 0;
+    if (setsockopt(socket, IPPROTO_TCP, TCP_CORK, &flag, sizeof(flag)) < 0) {
+        LOG_WARNING("Failed to set TCP_CORK: " << std::strerror(errno));
+    }
+}
+
 void SocketUtils::set_socket_timeout(int socket, int timeout_seconds) {
     struct timeval timeout;
     timeout.tv_sec = timeout_seconds;
@@ -199,22 +571,101 @@ std::string SocketUtils::get_local_ip() {
     return "127.0.0.1";
 }
 
+namespace {
+
+// Single-store big-endian field access: htonl/ntohl compile to one
+// bswap + mov instead of four shift-and-or byte operations
+inline void put_u32(std::vector<uint8_t>& buf, size_t& off, uint32_t value) {
+    uint32_t be = htonl(value);
+    std::memcpy(buf.data() + off, &be, 4);
+    off += 4;
+}
+
+inline uint32_t get_u32(const uint8_t* data, size_t& off) {
+    uint32_t be;
+    std::memcpy(&be, data + off, 4);
+    off += 4;
+    return ntohl(be);
+}
+
+inline void put_u16(std::vector<uint8_t>& buf, size_t& off, uint16_t value) {
+    uint16_t be = htons(value);
+    std::memcpy(buf.data() + off, &be, 2);
+    off += 2;
+}
+
+inline uint16_t get_u16(const uint8_t* data, size_t& off) {
+    uint16_t be;
+    std::memcpy(&be, data + off, 2);
+    off += 2;
+    return ntohs(be);
+}
+
+// Streams payload bytes to a socket through a 64 KiB staging buffer:
+// small fields accumulate and go out in buffer-sized sends, large blocks
+// bypass the buffer.  Lets serializers write field by field without ever
+// holding the whole payload in memory.
+class StreamWriter {
+public:
+    explicit StreamWriter(int socket) : fd_(socket), buf_(64 * 1024) {}
+
+    ~StreamWriter() {
+        // Callers flush explicitly; this is a backstop during unwinding,
+        // where a send failure must not throw again
+        try {
+            flush();
+        } catch (...) {
+        }
+    }
+
+    void bytes(const void* data, size_t size) {
+        if (size >= buf_.size()) {
+            flush();
+            SocketUtils::send_data_raw(fd_, data, size);
+            return;
+        }
+        if (used_ + size > buf_.size()) {
+            flush();
+        }
+        std::memcpy(buf_.data() + used_, data, size);
+        used_ += size;
+    }
+
+    void u8(uint8_t value) { bytes(&value, 1); }
+
+    void u16(uint16_t value) {
+        uint16_t be = htons(value);
+        bytes(&be, 2);
+    }
+
+    void u32(uint32_t value) {
+        uint32_t be = htonl(value);
+        bytes(&be, 4);
+    }
+
+    void flush() {
+        if (used_ > 0) {
+            SocketUtils::send_data_raw(fd_, buf_.data(), used_);
+            used_ = 0;
+        }
+    }
+
+private:
+    int fd_;
+    size_t used_ = 0;
+    std::vector<uint8_t> buf_;
+};
+
+} // namespace
+
 std::vector<uint8_t> SocketUtils::serialize_message(const Message& message) {
-    std::vector<uint8_t> serialized;
-    
-    // Add message type
-    serialized.push_back(static_cast<uint8_t>(message.type));
-    
-    // Add message size 
-    uint32_t size = message.size;
-    serialized.push_back((size >> 24) & 0xFF);
-    serialized.push_back((size >> 16) & 0xFF);
-    serialized.push_back((size >> 8) & 0xFF);
-    serialized.push_back(size & 0xFF);
-    
-    // Add message data
-    serialized.insert(serialized.end(), message.data.begin(), message.data.end());
-    
+    std::vector<uint8_t> serialized(5 + message.data.size());
+
+    serialized[0] = static_cast<uint8_t>(message.type);
+    size_t off = 1;
+    put_u32(serialized, off, message.size);
+    std::memcpy(serialized.data() + off, message.data.data(), message.data.size());
+
     return serialized;
 }
 
@@ -222,16 +673,17 @@ Message SocketUtils::deserialize_message(const std::vector<uint8_t>& data) {
     if (data.size() < 5) {
         throw NetworkException("Invalid message data: too small");
     }
-    
+
     MessageType type = static_cast<MessageType>(data[0]);
-    uint32_t size = (data[1] << 24) | (data[2] << 16) | (data[3] << 8) | data[4];
-    
+    size_t off = 1;
+    uint32_t size = get_u32(data.data(), off);
+
     if (data.size() != 5 + size) {
         throw NetworkException("Invalid message data: size mismatch");
     }
-    
+
     std::vector<uint8_t> msg_data(data.begin() + 5, data.end());
-    return Message(type, msg_data);
+    return Message(type, std::move(msg_data));
 }
 
 void SocketUtils::send_all(int socket, const void* data, size_t size) {
@@ -239,10 +691,16 @@ void SocketUtils::send_all(int socket, const void* data, size_t size) {
     size_t total_sent = 0;
     
     while (total_sent < size) {
-        ssize_t sent = send(socket, bytes + total_sent, size - total_sent, MSG_NOSIGNAL);
+        ssize_t sent = net_send(socket, bytes + total_sent, size - total_sent);
         if (sent < 0) {
             if (errno == EAGAIN || errno == EWOULDBLOCK) {
-                continue; 
+                // Sleep until the fd is writable instead of spinning; a
+                // socket that stays unwritable past the protocol timeout
+                // is treated as dead
+                if (!socket_ready_for_write(socket, SOCKET_TIMEOUT * 1000)) {
+                    throw NetworkException("send timed out waiting for socket to become writable");
+                }
+                continue;
             }
             throw_network_error("send");
         }
@@ -250,87 +708,199 @@ void SocketUtils::send_all(int socket, const void* data, size_t size) {
     }
 }
 
+void SocketUtils::send_all_vectored(int socket, struct iovec* iov, int iov_count) {
+    while (iov_count > 0) {
+        ssize_t sent = net_writev(socket, iov, iov_count);
+        if (sent < 0) {
+            if (errno == EAGAIN || errno == EWOULDBLOCK) {
+                if (!socket_ready_for_write(socket, SOCKET_TIMEOUT * 1000)) {
+                    throw NetworkException("send timed out waiting for socket to become writable");
+                }
+                continue;
+            }
+            throw_network_error("writev");
+        }
+
+        // Advance past fully-written buffers, then adjust the partial one
+        size_t remaining = static_cast<size_t>(sent);
+        while (iov_count > 0 && remaining >= iov->iov_len) {
+            remaining -= iov->iov_len;
+            ++iov;
+            --iov_count;
+        }
+        if (iov_count > 0 && remaining > 0) {
+            iov->iov_base = static_cast<uint8_t*>(iov->iov_base) + remaining;
+            iov->iov_len -= remaining;
+        }
+    }
+}
+
+namespace {
+
+// Application-level receive buffer: one recv refills up to 64 KiB and
+// subsequent logical reads (5-byte headers, 16-byte labels) drain it
+// without touching the kernel, amortizing the syscall cost across many
+// small reads.  Each protocol thread talks to exactly one peer socket,
+// so a single thread-local buffer keyed by fd suffices.
+constexpr size_t RX_BUF_SIZE = 64 * 1024;
+
+struct RecvBuffer {
+    int fd = -1;
+    size_t head = 0;
+    size_t tail = 0;
+    std::vector<uint8_t> buf;
+};
+
+thread_local RecvBuffer rx;
+
+} // namespace
+
 void SocketUtils::receive_all(int socket, void* data, size_t size) {
     uint8_t* bytes = static_cast<uint8_t*>(data);
     size_t total_received = 0;
-    
+
+    if (rx.fd != socket) {
+        // New connection on this thread; any leftover bytes belonged to
+        // the previous (closed) one
+        rx.fd = socket;
+        rx.head = rx.tail = 0;
+        rx.buf.resize(RX_BUF_SIZE);
+    }
+
     while (total_received < size) {
-        ssize_t received = recv(socket, bytes + total_received, size - total_received, 0);
-        if (received < 0) {
-            if (errno == EAGAIN || errno == EWOULDBLOCK) {
-                continue; 
+        // Drain buffered bytes first
+        if (rx.head != rx.tail) {
+            size_t n = std::min(size - total_received, rx.tail - rx.head);
+            std::memcpy(bytes + total_received, rx.buf.data() + rx.head, n);
+            rx.head += n;
+            total_received += n;
+            continue;
+        }
+
+        // Buffer empty: large remainders go straight into the caller's
+        // buffer (buffering would just add a copy), small ones refill
+        if (size - total_received >= RX_BUF_SIZE) {
+            // MSG_WAITALL lets the kernel return once with the full block
+            // instead of waking us per arriving segment; the loop still
+            // covers signal-interrupted short reads
+            ssize_t received = net_recv(socket, bytes + total_received, size - total_received,
+                                        MSG_WAITALL);
+            if (received < 0) {
+                if (errno == EAGAIN || errno == EWOULDBLOCK) {
+                    if (!socket_ready_for_read(socket, SOCKET_TIMEOUT * 1000)) {
+                        throw NetworkException("receive timed out waiting for data");
+                    }
+                    continue;
+                }
+                throw_network_error("recv");
+            } else if (received == 0) {
+                throw NetworkException("Connection closed by peer");
             }
-            throw_network_error("recv");
-        } else if (received == 0) {
-            throw NetworkException("Connection closed by peer");
+            total_received += received;
+        } else {
+            ssize_t received = net_recv(socket, rx.buf.data(), RX_BUF_SIZE);
+            if (received < 0) {
+                if (errno == EAGAIN || errno == EWOULDBLOCK) {
+                    if (!socket_ready_for_read(socket, SOCKET_TIMEOUT * 1000)) {
+                        throw NetworkException("receive timed out waiting for data");
+                    }
+                    continue;
+                }
+                throw_network_error("recv");
+            } else if (received == 0) {
+                throw NetworkException("Connection closed by peer");
+            }
+            rx.head = 0;
+            rx.tail = static_cast<size_t>(received);
         }
-        total_received += received;
     }
 }
 
 void SocketUtils::throw_network_error(const std::string& operation) {
-    std::stringstream ss;
-    ss << operation << " failed: " << std::strerror(errno) << " (errno=" << errno << ")";
-    throw NetworkException(ss.str());
+    // Runs in retry loops on flaky networks, so no stringstream here:
+    // snprintf into a stack buffer keeps the path free of locale setup
+    // and heap growth (errno is latched first — snprintf may clobber it)
+    char buf[128];
+    int e = errno;
+    std::snprintf(buf, sizeof(buf), "%s failed: %s (errno=%d)",
+                  operation.c_str(), std::strerror(e), e);
+    throw NetworkException(buf);
 }
 
 // SocketConnection implementation
-SocketConnection::SocketConnection(int port) 
-    : server_socket(-1), comm_socket(-1), is_server(true) {
-    server_socket = SocketUtils::create_server_socket(port);
-}
-
 SocketConnection::SocketConnection(const std::string& hostname, int port)
-    : server_socket(-1), comm_socket(-1), is_server(false) {
-    comm_socket = SocketUtils::connect_to_server(hostname, port);
+    : comm_socket(SocketUtils::connect_to_server(hostname, port)) {
 }
 
 SocketConnection::~SocketConnection() {
-    cleanup();
+    close();
 }
 
 SocketConnection::SocketConnection(SocketConnection&& other) noexcept
-    : server_socket(other.server_socket), comm_socket(other.comm_socket), is_server(other.is_server) {
-    other.server_socket = -1;
+    : comm_socket(other.comm_socket) {
     other.comm_socket = -1;
 }
 
 SocketConnection& SocketConnection::operator=(SocketConnection&& other) noexcept {
     if (this != &other) {
-        cleanup();
-        server_socket = other.server_socket;
+        close();
         comm_socket = other.comm_socket;
-        is_server = other.is_server;
-        other.server_socket = -1;
         other.comm_socket = -1;
     }
     return *this;
 }
 
-void SocketConnection::wait_for_client() {
-    if (!is_server || server_socket < 0) {
-        throw NetworkException("Not a server connection");
-    }
-    
+void SocketConnection::close() {
     if (comm_socket >= 0) {
         SocketUtils::close_socket(comm_socket);
+        comm_socket = -1;
     }
-    
-    comm_socket = SocketUtils::accept_client(server_socket);
 }
 
-void SocketConnection::close() {
-    cleanup();
+// ServerListener implementation
+ServerListener::ServerListener(int port)
+    : listen_fd(-1) {
+    // A driver (e.g. plot.py) may pass an already-bound, already-listening
+    // socket via GC_LISTEN_FD to avoid the bind/close/re-bind port race.
+    const char* env_fd = std::getenv("GC_LISTEN_FD");
+    if (env_fd && *env_fd) {
+        listen_fd = std::atoi(env_fd);
+        LOG_INFO("Adopted pre-bound listen socket (fd " << listen_fd << ")");
+    } else {
+        listen_fd = SocketUtils::create_server_socket(port);
+    }
 }
 
-void SocketConnection::cleanup() {
-    if (comm_socket >= 0) {
-        SocketUtils::close_socket(comm_socket);
-        comm_socket = -1;
+ServerListener::~ServerListener() {
+    close();
+}
+
+ServerListener::ServerListener(ServerListener&& other) noexcept
+    : listen_fd(other.listen_fd) {
+    other.listen_fd = -1;
+}
+
+ServerListener& ServerListener::operator=(ServerListener&& other) noexcept {
+    if (this != &other) {
+        close();
+        listen_fd = other.listen_fd;
+        other.listen_fd = -1;
     }
-    if (server_socket >= 0) {
-        SocketUtils::close_socket(server_socket);
-        server_socket = -1;
+    return *this;
+}
+
+std::unique_ptr<SocketConnection> ServerListener::accept_connection() {
+    if (listen_fd < 0) {
+        throw NetworkException("Listener is closed");
+    }
+    int comm_fd = SocketUtils::accept_client(listen_fd);
+    return std::unique_ptr<SocketConnection>(new SocketConnection(comm_fd));
+}
+
+void ServerListener::close() {
+    if (listen_fd >= 0) {
+        SocketUtils::close_socket(listen_fd);
+        listen_fd = -1;
     }
 }
 
@@ -341,6 +911,14 @@ ProtocolManager::ProtocolManager(std::unique_ptr<SocketConnection> conn)
     }
 }
 
+void ProtocolManager::begin_batch() {
+    SocketUtils::set_cork(connection->get_socket(), true);
+}
+
+void ProtocolManager::end_batch() {
+    SocketUtils::set_cork(connection->get_socket(), false);
+}
+
 void ProtocolManager::send_hello(const std::string& party_name) {
     std::vector<uint8_t> data(party_name.begin(), party_name.end());
     Message msg(MessageType::HELLO, data);
@@ -361,10 +939,8 @@ void ProtocolManager::send_circuit(const GarbledCircuit& garbled_circuit) {
               << garbled_circuit.circuit.num_inputs << " inputs, " 
               << garbled_circuit.circuit.num_outputs << " outputs" << std::endl;
     
-    auto serialized = serialize_garbled_circuit(garbled_circuit);
-    std::cout << "           Serialized size: " << serialized.size() << " bytes" << std::endl;
-    Message msg(MessageType::CIRCUIT, serialized);
-    SocketUtils::send_message(connection->get_socket(), msg);
+    size_t sent = stream_garbled_circuit(connection->get_socket(), garbled_circuit);
+    std::cout << "           Serialized size: " << sent << " bytes" << std::endl;
     std::cout << "[PROTOCOL] Circuit transmission completed" << std::endl;
 }
 
@@ -376,6 +952,7 @@ GarbledCircuit ProtocolManager::receive_circuit() {
         throw NetworkException("Expected CIRCUIT message");
     }
     auto gc = deserialize_garbled_circuit(msg.data);
+    BufferPool::release(std::move(msg.data));
     std::cout << "[PROTOCOL] Circuit deserialization completed" << std::endl;
     std::cout << "           Circuit: " << gc.circuit.gates.size() << " gates, " 
               << gc.circuit.num_inputs << " inputs, " 
@@ -384,22 +961,17 @@ GarbledCircuit ProtocolManager::receive_circuit() {
 }
 
 void ProtocolManager::send_input_labels(const std::vector<WireLabel>& labels) {
-    std::vector<uint8_t> data;
-    
-    // Add count
-    uint32_t count = labels.size();
-    data.push_back((count >> 24) & 0xFF);
-    data.push_back((count >> 16) & 0xFF);
-    data.push_back((count >> 8) & 0xFF);
-    data.push_back(count & 0xFF);
-    
-    // Add labels
-    for (const auto& label : labels) {
-        data.insert(data.end(), label.begin(), label.end());
+    // The framing header already carries the payload size, which pins
+    // down the label count (size / 16) — no separate count prefix, and
+    // the contiguous labels vector goes out as a single iovec
+    std::vector<struct iovec> iov;
+    if (!labels.empty()) {
+        iov.resize(1);
+        iov[0].iov_base = const_cast<WireLabel*>(labels.data());
+        iov[0].iov_len = labels.size() * WIRE_LABEL_SIZE;
     }
-    
-    Message msg(MessageType::INPUT_LABELS, data);
-    SocketUtils::send_message(connection->get_socket(), msg);
+
+    SocketUtils::send_message_gather(connection->get_socket(), MessageType::INPUT_LABELS, iov);
 }
 
 std::vector<WireLabel> ProtocolManager::receive_input_labels(size_t expected_count) {
@@ -408,29 +980,19 @@ std::vector<WireLabel> ProtocolManager::receive_input_labels(size_t expected_cou
         throw NetworkException("Expected INPUT_LABELS message");
     }
     
-    if (msg.data.size() < 4) {
-        throw NetworkException("Invalid input labels message");
-    }
-    
-    uint32_t count = (msg.data[0] << 24) | (msg.data[1] << 16) | (msg.data[2] << 8) | msg.data[3];
-    if (count != expected_count) {
+    // The payload is nothing but labels; its size determines the count
+    if (msg.data.size() % WIRE_LABEL_SIZE != 0
+        || msg.data.size() / WIRE_LABEL_SIZE != expected_count) {
         throw NetworkException("Input labels count mismatch");
     }
-    
-    std::vector<WireLabel> labels;
-    labels.reserve(count);
-    
-    for (size_t i = 0; i < count; ++i) {
-        size_t offset = 4 + i * WIRE_LABEL_SIZE;
-        if (msg.data.size() < offset + WIRE_LABEL_SIZE) {
-            throw NetworkException("Insufficient data for labels");
-        }
-        
-        WireLabel label;
-        std::copy(msg.data.begin() + offset, msg.data.begin() + offset + WIRE_LABEL_SIZE, label.begin());
-        labels.push_back(label);
+
+    // One bulk copy into the labels' contiguous storage
+    std::vector<WireLabel> labels(expected_count);
+    if (expected_count > 0) {
+        std::memcpy(labels.data(), msg.data.data(), expected_count * WIRE_LABEL_SIZE);
     }
-    
+
+    BufferPool::release(std::move(msg.data));
     return labels;
 }
 
@@ -444,7 +1006,7 @@ std::vector<uint8_t> ProtocolManager::receive_result() {
     if (msg.type != MessageType::RESULT) {
         throw NetworkException("Expected RESULT message");
     }
-    return msg.data;
+    return std::move(msg.data);
 }
 
 void ProtocolManager::send_error(const std::string& error_message) {
@@ -466,145 +1028,225 @@ bool ProtocolManager::is_connected() const {
     return connection && connection->is_connected();
 }
 
-std::vector<uint8_t> ProtocolManager::serialize_garbled_circuit(const GarbledCircuit& gc) {
-    std::vector<uint8_t> data;
-    
-    // Add circuit basic info
-    uint32_t num_gates = gc.circuit.num_gates;
-    uint32_t num_inputs = gc.circuit.num_inputs;
-    uint32_t num_outputs = gc.circuit.num_outputs;
-    
-    data.push_back((num_gates >> 24) & 0xFF);
-    data.push_back((num_gates >> 16) & 0xFF);
-    data.push_back((num_gates >> 8) & 0xFF);
-    data.push_back(num_gates & 0xFF);
-    
-    data.push_back((num_inputs >> 24) & 0xFF);
-    data.push_back((num_inputs >> 16) & 0xFF);
-    data.push_back((num_inputs >> 8) & 0xFF);
-    data.push_back(num_inputs & 0xFF);
-    
-    data.push_back((num_outputs >> 24) & 0xFF);
-    data.push_back((num_outputs >> 16) & 0xFF);
-    data.push_back((num_outputs >> 8) & 0xFF);
-    data.push_back(num_outputs & 0xFF);
-    
-    // Add input wires
+size_t ProtocolManager::stream_garbled_circuit(int socket, const GarbledCircuit& gc) {
+    // The exact payload size is computable up front, so the framing
+    // header can go out first and the circuit streams field by field
+    // through a 64 KiB staging buffer — the full serialization is never
+    // materialized in memory.  A leading flags byte says whether the
+    // topology section that follows is raw or LZ4-compressed.
+    size_t topology_size = 12
+                 + 4 * (gc.circuit.input_wires.size() + gc.circuit.output_wires.size())
+                 + 13 * gc.circuit.gates.size();
+    size_t tables_size = 0;
+    for (const auto& garbled_gate : gc.garbled_gates) {
+        for (const auto& ciphertext : garbled_gate.ciphertexts) {
+            tables_size += 2 + ciphertext.size();
+        }
+    }
+
+    // Garbled tables.  Each row is length-prefixed: with Free-XOR, XOR
+    // gates carry no ciphertexts at all, so table sizes vary per gate type
+    // and the stream has to be self-describing.
+    auto write_tables = [&gc](StreamWriter& out) {
+        for (const auto& garbled_gate : gc.garbled_gates) {
+            for (const auto& ciphertext : garbled_gate.ciphertexts) {
+                out.u16(static_cast<uint16_t>(ciphertext.size()));
+                if (!ciphertext.empty()) {
+                    out.bytes(ciphertext.data(), ciphertext.size());
+                }
+            }
+        }
+    };
+
+#ifdef GC_HAVE_LZ4
+    // Compress the topology when it is big enough to matter; tiny
+    // circuits are not worth the extra framing
+    if (topology_size >= 4096 && topology_size <= LZ4_MAX_INPUT_SIZE) {
+        std::vector<uint8_t> topology = BufferPool::acquire(topology_size);
+        size_t off = 0;
+        put_u32(topology, off, gc.circuit.num_gates);
+        put_u32(topology, off, gc.circuit.num_inputs);
+        put_u32(topology, off, gc.circuit.num_outputs);
+        for (int wire : gc.circuit.input_wires) {
+            put_u32(topology, off, wire);
+        }
+        for (int wire : gc.circuit.output_wires) {
+            put_u32(topology, off, wire);
+        }
+        for (const auto& gate : gc.circuit.gates) {
+            put_u32(topology, off, gate.input_wire1);
+            put_u32(topology, off, gate.input_wire2);
+            put_u32(topology, off, gate.output_wire);
+            topology[off++] = static_cast<uint8_t>(gate.type);
+        }
+
+        std::vector<uint8_t> compressed =
+            BufferPool::acquire(LZ4_compressBound(static_cast<int>(topology_size)));
+        int comp_size = LZ4_compress_default(
+            reinterpret_cast<const char*>(topology.data()),
+            reinterpret_cast<char*>(compressed.data()),
+            static_cast<int>(topology_size), static_cast<int>(compressed.size()));
+
+        if (comp_size > 0 && static_cast<size_t>(comp_size) < topology_size) {
+            size_t total = 1 + 8 + static_cast<size_t>(comp_size) + tables_size;
+            SocketUtils::begin_message(socket, MessageType::CIRCUIT, static_cast<uint32_t>(total));
+            StreamWriter out(socket);
+            out.u8(1); // LZ4-compressed topology
+            out.u32(static_cast<uint32_t>(comp_size));
+            out.u32(static_cast<uint32_t>(topology_size));
+            out.bytes(compressed.data(), static_cast<size_t>(comp_size));
+            write_tables(out);
+            out.flush();
+            BufferPool::release(std::move(compressed));
+            BufferPool::release(std::move(topology));
+            return total;
+        }
+
+        // Incompressible or over-large topology: fall through to raw
+        BufferPool::release(std::move(compressed));
+        BufferPool::release(std::move(topology));
+    }
+#endif
+
+    size_t total = 1 + topology_size + tables_size;
+    SocketUtils::begin_message(socket, MessageType::CIRCUIT, static_cast<uint32_t>(total));
+    StreamWriter out(socket);
+    out.u8(0); // raw topology
+
+    // Circuit basic info
+    out.u32(gc.circuit.num_gates);
+    out.u32(gc.circuit.num_inputs);
+    out.u32(gc.circuit.num_outputs);
+
+    // Input and output wires
     for (int wire : gc.circuit.input_wires) {
-        data.push_back((wire >> 24) & 0xFF);
-        data.push_back((wire >> 16) & 0xFF);
-        data.push_back((wire >> 8) & 0xFF);
-        data.push_back(wire & 0xFF);
+        out.u32(wire);
     }
-    
-    // Add output wires  
     for (int wire : gc.circuit.output_wires) {
-        data.push_back((wire >> 24) & 0xFF);
-        data.push_back((wire >> 16) & 0xFF);
-        data.push_back((wire >> 8) & 0xFF);
-        data.push_back(wire & 0xFF);
+        out.u32(wire);
     }
-    
-    // Add gates
+
+    // Gates
     for (const auto& gate : gc.circuit.gates) {
-        data.push_back((gate.input_wire1 >> 24) & 0xFF);
-        data.push_back((gate.input_wire1 >> 16) & 0xFF);
-        data.push_back((gate.input_wire1 >> 8) & 0xFF);
-        data.push_back(gate.input_wire1 & 0xFF);
-        
-        data.push_back((gate.input_wire2 >> 24) & 0xFF);
-        data.push_back((gate.input_wire2 >> 16) & 0xFF);
-        data.push_back((gate.input_wire2 >> 8) & 0xFF);
-        data.push_back(gate.input_wire2 & 0xFF);
-        
-        data.push_back((gate.output_wire >> 24) & 0xFF);
-        data.push_back((gate.output_wire >> 16) & 0xFF);
-        data.push_back((gate.output_wire >> 8) & 0xFF);
-        data.push_back(gate.output_wire & 0xFF);
-        
-        data.push_back(static_cast<uint8_t>(gate.type));
-    }
-    
-    // Add garbled gates 
-    for (size_t i = 0; i < gc.garbled_gates.size(); ++i) {
-        const auto& garbled_gate = gc.garbled_gates[i];
-        for (size_t j = 0; j < garbled_gate.ciphertexts.size(); ++j) {
-            const auto& ciphertext = garbled_gate.ciphertexts[j];
-            data.insert(data.end(), ciphertext.begin(), ciphertext.end());
-        }
+        out.u32(gate.input_wire1);
+        out.u32(gate.input_wire2);
+        out.u32(gate.output_wire);
+        out.u8(static_cast<uint8_t>(gate.type));
     }
-    
-    return data;
+
+    write_tables(out);
+
+    out.flush();
+    return total;
 }
 
 GarbledCircuit ProtocolManager::deserialize_garbled_circuit(const std::vector<uint8_t>& data) {
-    if (data.size() < 12) {
+    if (data.size() < 13) {
         throw NetworkException("Invalid garbled circuit data");
     }
     
     GarbledCircuit gc;
+    const uint8_t* bytes = data.data();
     size_t offset = 0;
-    
+
+    // Flags byte: 0 = raw topology, 1 = LZ4-compressed topology
+    uint8_t flags = bytes[offset++];
+
+    // Topology fields are read through tbytes/toff/tlimit so the same
+    // parse code works whether they sit in `data` or in a decompressed
+    // side buffer; the garbled tables always follow raw in `data`
+    std::vector<uint8_t> topology;
+    const uint8_t* tbytes = bytes;
+    size_t toff = offset;
+    size_t tlimit = data.size();
+
+    if (flags == 1) {
+#ifdef GC_HAVE_LZ4
+        uint32_t comp_size = get_u32(bytes, offset);
+        uint32_t topology_size = get_u32(bytes, offset);
+        if (offset + comp_size > data.size()) {
+            throw NetworkException("Invalid circuit data: compressed topology");
+        }
+        topology = BufferPool::acquire(topology_size);
+        int n = LZ4_decompress_safe(reinterpret_cast<const char*>(bytes + offset),
+                                    reinterpret_cast<char*>(topology.data()),
+                                    static_cast<int>(comp_size),
+                                    static_cast<int>(topology_size));
+        if (n < 0 || static_cast<uint32_t>(n) != topology_size) {
+            throw NetworkException("Corrupt compressed circuit topology");
+        }
+        offset += comp_size;
+        tbytes = topology.data();
+        toff = 0;
+        tlimit = topology_size;
+#else
+        throw NetworkException("Received LZ4-compressed circuit but LZ4 support is not built in");
+#endif
+    } else if (flags != 0) {
+        throw NetworkException("Unknown circuit encoding flags");
+    }
+
     // Deserialize basic info
-    uint32_t num_gates = (data[0] << 24) | (data[1] << 16) | (data[2] << 8) | data[3];
-    uint32_t num_inputs = (data[4] << 24) | (data[5] << 16) | (data[6] << 8) | data[7];
-    uint32_t num_outputs = (data[8] << 24) | (data[9] << 16) | (data[10] << 8) | data[11];
-    
+    if (toff + 12 > tlimit) throw NetworkException("Invalid circuit data: header");
+    uint32_t num_gates = get_u32(tbytes, toff);
+    uint32_t num_inputs = get_u32(tbytes, toff);
+    uint32_t num_outputs = get_u32(tbytes, toff);
+
     gc.circuit.num_gates = num_gates;
     gc.circuit.num_inputs = num_inputs;
     gc.circuit.num_outputs = num_outputs;
-    offset = 12;
-    
+
     // Deserialize input wires
     for (uint32_t i = 0; i < num_inputs; ++i) {
-        if (offset + 4 > data.size()) throw NetworkException("Invalid circuit data: input wires");
-        int wire = (data[offset] << 24) | (data[offset+1] << 16) | (data[offset+2] << 8) | data[offset+3];
-        gc.circuit.input_wires.push_back(wire);
-        offset += 4;
+        if (toff + 4 > tlimit) throw NetworkException("Invalid circuit data: input wires");
+        gc.circuit.input_wires.push_back(static_cast<int>(get_u32(tbytes, toff)));
     }
-    
+
     // Deserialize output wires
     for (uint32_t i = 0; i < num_outputs; ++i) {
-        if (offset + 4 > data.size()) throw NetworkException("Invalid circuit data: output wires");
-        int wire = (data[offset] << 24) | (data[offset+1] << 16) | (data[offset+2] << 8) | data[offset+3];
-        gc.circuit.output_wires.push_back(wire);
-        offset += 4;
+        if (toff + 4 > tlimit) throw NetworkException("Invalid circuit data: output wires");
+        gc.circuit.output_wires.push_back(static_cast<int>(get_u32(tbytes, toff)));
     }
-    
+
     // Deserialize gates
     for (uint32_t i = 0; i < num_gates; ++i) {
-        if (offset + 13 > data.size()) throw NetworkException("Invalid circuit data: gates");
-        
-        int input1 = (data[offset] << 24) | (data[offset+1] << 16) | (data[offset+2] << 8) | data[offset+3];
-        offset += 4;
-        
-        int input2 = (data[offset] << 24) | (data[offset+1] << 16) | (data[offset+2] << 8) | data[offset+3];
-        offset += 4;
-        
-        int output = (data[offset] << 24) | (data[offset+1] << 16) | (data[offset+2] << 8) | data[offset+3];
-        offset += 4;
-        
-        GateType gate_type = static_cast<GateType>(data[offset]);
-        offset += 1;
-        
-        Gate gate(output, input1, input2, gate_type);
-        gc.circuit.gates.push_back(gate);
+        if (toff + 13 > tlimit) throw NetworkException("Invalid circuit data: gates");
+
+        int input1 = static_cast<int>(get_u32(tbytes, toff));
+        int input2 = static_cast<int>(get_u32(tbytes, toff));
+        int output = static_cast<int>(get_u32(tbytes, toff));
+        GateType gate_type = static_cast<GateType>(tbytes[toff]);
+        toff += 1;
+
+        gc.circuit.gates.emplace_back(output, input1, input2, gate_type);
     }
-    
-    // Deserialize garbled gates (ciphertexts)
+
+    if (!topology.empty()) {
+        BufferPool::release(std::move(topology));
+    } else {
+        // Raw layout: the tables continue right after the topology
+        offset = toff;
+    }
+
+    // Deserialize garbled gates (length-prefixed ciphertexts; XOR gates
+    // have zero-length rows under Free-XOR)
     gc.garbled_gates.resize(num_gates);
     for (uint32_t i = 0; i < num_gates; ++i) {
-        for (int j = 0; j < 4; ++j) { // 4 ciphertexts per truth table
-            size_t ciphertext_size = WIRE_LABEL_SIZE + 16; // Size as defined in GarbledGate
+        for (int j = 0; j < 4; ++j) {
+            if (offset + 2 > data.size()) {
+                throw NetworkException("Invalid circuit data: garbled gates");
+            }
+            size_t ciphertext_size = get_u16(bytes, offset);
+
             if (offset + ciphertext_size > data.size()) {
                 throw NetworkException("Invalid circuit data: garbled gates");
             }
-            
-            std::vector<uint8_t> ciphertext(data.begin() + offset, data.begin() + offset + ciphertext_size);
-            gc.garbled_gates[i].ciphertexts[j] = ciphertext;
+
+            gc.garbled_gates[i].ciphertexts[j].assign(data.begin() + offset,
+                                                      data.begin() + offset + ciphertext_size);
             offset += ciphertext_size;
         }
     }
-    
+
     return gc;
 }
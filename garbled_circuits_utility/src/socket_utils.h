@@ -40,12 +40,32 @@ public:
     
     // Receive message from socket
     static Message receive_message(int socket);
+
+    // Start a message by hand: sends only the 5-byte framing header.
+    // The caller then streams exactly payload_size bytes of payload
+    // (e.g. via send_data) — used where materializing the whole payload
+    // first would double peak memory.
+    static void begin_message(int socket, MessageType type, uint32_t payload_size);
+
+    // Send a message whose payload is scattered across several buffers.
+    // Prepends the 5-byte framing header and gathers everything with
+    // writev (in IOV_MAX-sized chunks), so the caller never has to copy
+    // the pieces into one contiguous payload.  Mutates iov.
+    static void send_message_gather(int socket, MessageType type,
+                                    std::vector<struct iovec>& iov);
     
     // Send raw data
     static void send_data(int socket, const std::vector<uint8_t>& data);
+
+    // Send a raw byte range (for streaming serializers)
+    static void send_data_raw(int socket, const void* data, size_t size);
     
     // Receive raw data of specified size
     static std::vector<uint8_t> receive_data(int socket, size_t size);
+
+    // In-place variant: resizes and fills a caller-owned buffer so its
+    // capacity can be reused across messages
+    static void receive_data(int socket, size_t size, std::vector<uint8_t>& out);
     
     // Send wire label
     static void send_wire_label(int socket, const WireLabel& label);
@@ -65,6 +85,15 @@ public:
     
     // Close socket safely
     static void close_socket(int socket);
+
+    // Size the kernel send/receive buffers for bulk circuit transfers
+    // (GC_SOCKBUF_BYTES overrides the default)
+    static void tune_for_bulk(int socket);
+
+    // Cork/uncork the socket: while corked the kernel holds partial
+    // segments, so several back-to-back messages leave as full packets;
+    // uncorking flushes whatever is pending
+    static void set_cork(int socket, bool corked);
     
     // Set socket timeout
     static void set_socket_timeout(int socket, int timeout_seconds);
@@ -87,7 +116,11 @@ public:
 private:
     // Send all data (handles partial sends)
     static void send_all(int socket, const void* data, size_t size);
-    
+
+    // Scatter-gather send of several buffers in one syscall (handles
+    // partial writes)
+    static void send_all_vectored(int socket, struct iovec* iov, int iov_count);
+
     // Receive all data (handles partial receives)
     static void receive_all(int socket, void* data, size_t size);
     
@@ -96,17 +129,32 @@ private:
 };
 
 /**
- * RAII wrapper for socket management
+ * Thread-local freelist of byte buffers for the I/O path.  Receive and
+ * serialization code acquires a vector whose capacity survives from the
+ * previous message on this thread, and releases it once the payload has
+ * been consumed — repeated round-trips then run without malloc/free.
+ */
+class BufferPool {
+public:
+    // Get a buffer of the given size (capacity reused when available)
+    static std::vector<uint8_t> acquire(size_t size);
+
+    // Return a buffer to the pool for reuse
+    static void release(std::vector<uint8_t>&& buf);
+};
+
+/**
+ * RAII wrapper for one established connection.  Holds nothing but the
+ * communication socket; the garbler's listening socket lives in
+ * ServerListener, so client-side connections carry no dead server state
+ * and close/move paths have no is-server branch.
  */
 class SocketConnection {
 public:
-    // Constructor for server-side (garbler)
-    explicit SocketConnection(int port);
-    
     // Constructor for client-side (evaluator)
     SocketConnection(const std::string& hostname, int port);
     
-    // Destructor - automatically closes sockets
+    // Destructor - automatically closes the socket
     ~SocketConnection();
     
     // Non-copyable but movable
@@ -121,18 +169,42 @@ public:
     // Check if connection is valid
     bool is_connected() const { return comm_socket >= 0; }
     
-    // Wait for client (server-side only)
-    void wait_for_client();
-    
     // Close connection
     void close();
 
 private:
-    int server_socket;  // Server listening socket (garbler only)
-    int comm_socket;    // Communication socket (both)
-    bool is_server;     // True if this is server-side connection
+    friend class ServerListener;
+
+    // Adopt an already-connected socket (ServerListener::accept_connection)
+    explicit SocketConnection(int comm_fd) noexcept : comm_socket(comm_fd) {}
+
+    int comm_socket;    // Communication socket
+};
+
+/**
+ * RAII wrapper for the garbler's listening socket.  Binds (or adopts a
+ * pre-bound fd from GC_LISTEN_FD) on construction; each
+ * accept_connection() yields an established SocketConnection.
+ */
+class ServerListener {
+public:
+    explicit ServerListener(int port);
+    ~ServerListener();
+    
+    // Non-copyable but movable
+    ServerListener(const ServerListener&) = delete;
+    ServerListener& operator=(const ServerListener&) = delete;
+    ServerListener(ServerListener&& other) noexcept;
+    ServerListener& operator=(ServerListener&& other) noexcept;
+    
+    // Block until a client connects
+    std::unique_ptr<SocketConnection> accept_connection();
     
-    void cleanup();
+    // Close the listening socket
+    void close();
+
+private:
+    int listen_fd;
 };
 
 /**
@@ -153,6 +225,12 @@ public:
      * Protocol message exchange functions
      */
     
+    // Batch several back-to-back sends: corks the socket so the kernel
+    // coalesces the messages into full segments, uncorked (flushed) by
+    // end_batch
+    void begin_batch();
+    void end_batch();
+
     // Send hello message
     void send_hello(const std::string& party_name);
     
@@ -192,10 +270,12 @@ public:
     
 
 private:
-    
-    // Serialize garbled circuit for network transmission
-    std::vector<uint8_t> serialize_garbled_circuit(const GarbledCircuit& gc);
-    
+
+    // Stream the garbled circuit onto the socket as one CIRCUIT message,
+    // without materializing the full serialization in memory; returns the
+    // payload size that was sent
+    size_t stream_garbled_circuit(int socket, const GarbledCircuit& gc);
+
     // Deserialize network data to garbled circuit
     GarbledCircuit deserialize_garbled_circuit(const std::vector<uint8_t>& data);
 };